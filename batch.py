@@ -0,0 +1,821 @@
+"""
+Offline batch scoring for payroll exports.
+
+Streams a CSV or Parquet file in fixed-size chunks through the vectorized
+deduction logic and appends each scored chunk to the output file, so memory
+stays flat regardless of the number of rows. Chunks (shards) can be scored on
+a process pool; output order always matches input order.
+
+    python batch.py score payroll.csv scored.csv --chunk-size 100000 --workers 8
+
+The reports command renders one PDF report per row (what the app's Generate
+PDF button produces, without attachments) into a ZIP archive, also in
+shards on a process pool:
+
+    python batch.py reports payroll.csv reports.zip --lang en --workers 8
+
+The punches command turns time-clock punches into the Option B hour columns:
+
+    python batch.py punches punches.csv payroll_hours.csv --payroll payroll.csv
+
+and the paystubs command sums per-period pay stubs into year-to-date totals:
+
+    python batch.py paystubs stubs.csv ytd.csv --periods flagged.csv
+
+which the project command turns into year-end deduction percentiles:
+
+    python batch.py project ytd.csv projected.csv --draws 10000 --seed 7
+"""
+import argparse
+import csv
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Union
+
+import numpy as np
+import pandas as pd
+
+from logic import (BATCH_INPUT_COLUMNS, DEFAULT_TAX_YEAR, FILING_STATUS_CODES,
+                   INELIGIBLE_FILING_CODES, TAX_YEARS, DeductionInputError, apply_phaseout_cents_batch, compute_deduction,
+                   compute_deduction_batch, deduction_breakpoints, deduction_cents_batch,
+                   phaseout_limits_batch, to_cents_batch)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Column aliases accepted in the input file → names used by the logic layer
+COLUMN_ALIASES = {
+    "magi":          "total_income",
+    "filing_status": "filing_code",
+}
+
+# Computed columns written next to the input columns
+OUTPUT_COLUMNS = (
+    "ot_1_5_total", "ot_2_0_total", "ot_total_paid", "ot_1_5_premium",
+    "ot_2_0_premium", "rate_1_5", "rate_2_0", "expected_rate_1_5",
+    "expected_rate_2_0", "mismatch_1_5", "mismatch_2_0", "base_salary",
+    "qoc_gross", "deduction_limit", "total_deduction", "error",
+)
+
+# Added when the input has a qualified_tips column (combined tips + overtime run)
+TIPS_OUTPUT_COLUMNS = ("qualified_tips", "tips_limit", "tips_deduction", "combined_deduction")
+
+# Added with --breakpoints: where total_deduction stops growing (logic.deduction_breakpoints)
+BREAKPOINT_COLUMNS = (
+    "qoc_headroom", "magi_cap_binds", "magi_limit_zero", "max_extra_ot_1_5", "max_extra_ot_2_0",
+)
+
+# Columns recomputed in integer cents with --exact
+EXACT_COLUMNS = (
+    "ot_1_5_premium", "ot_2_0_premium", "qoc_gross", "deduction_limit", "total_deduction",
+)
+
+# Full UI labels (both languages) accepted as filing status values
+_FILING_LABELS = {
+    "soltero(a)": "single", "single": "single",
+    "cabeza de familia": "hoh", "head of household": "hoh",
+    "casado(a) presentando declaración conjunta": "mfj", "married filing jointly": "mfj",
+    "casado(a) presentando declaración por separado": "mfs", "married filing separately": "mfs",
+}
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Parquet input/output requires pyarrow (pip install pyarrow).")
+    return pq
+
+
+# ─────────────────────────────────────────────────────────────
+# SCORING
+# ─────────────────────────────────────────────────────────────
+def _logic_columns(chunk: pd.DataFrame) -> dict:
+    """Chunk columns renamed and coerced to what the logic layer expects."""
+    cols = {COLUMN_ALIASES.get(c, c): chunk[c] for c in chunk.columns}
+
+    if "filing_code" in cols:
+        codes = cols["filing_code"].fillna("").astype(str).str.strip().str.lower()
+        codes = codes.map(lambda c: _FILING_LABELS.get(c, c)).where(codes != "", "single")
+        cols["filing_code"] = codes.to_numpy(dtype=object)
+    if "method" in cols:
+        method = cols["method"].fillna("").astype(str).str.strip().str.lower()
+        # Empty cells fall back to per-row inference, like a missing column
+        inferred = np.where(pd.to_numeric(cols.get("regular_rate", 0), errors="coerce") > 0,
+                            "hours", "total")
+        cols["method"] = np.where(method == "", inferred, method).astype(object)
+    for c in (*BATCH_INPUT_COLUMNS, "tax_year"):
+        if c in cols:
+            cols[c] = pd.to_numeric(cols[c], errors="coerce").to_numpy(dtype=np.float64)
+    return cols
+
+
+def _exact_columns(scored: dict, cols: dict):
+    """Replace EXACT_COLUMNS in scored with their integer-cents values (see logic)."""
+    failed = scored["error"] != ""
+    codes = np.where(failed, "single", cols.get("filing_code", "single")).astype(str)
+    years = np.where(failed, DEFAULT_TAX_YEAR, cols["tax_year"]) if "tax_year" in cols else None
+    cents = deduction_cents_batch(to_cents_batch(scored["ot_1_5_total"]),
+                                  to_cents_batch(scored["ot_2_0_total"]),
+                                  to_cents_batch(scored["total_income"]), codes, years)
+    for c in EXACT_COLUMNS:
+        scored[c] = np.where(failed, np.nan, cents[c] / 100)
+    if "tips_limit" in scored:
+        tips_limit = apply_phaseout_cents_batch(to_cents_batch(scored["total_income"]),
+                                                *phaseout_limits_batch(codes, years, "tips"))
+        tips = np.minimum(to_cents_batch(scored["qualified_tips"]), tips_limit)
+        scored["tips_limit"] = np.where(failed, np.nan, tips_limit / 100)
+        scored["tips_deduction"] = np.where(failed, np.nan, tips / 100)
+        scored["combined_deduction"] = np.where(failed, np.nan, (cents["total_deduction"] + tips) / 100)
+
+
+def _breakpoint_columns(scored: dict, cols: dict) -> dict:
+    """BREAKPOINT_COLUMNS for the scored rows (NaN on rows with errors)."""
+    failed = scored["error"] != ""
+    codes = np.where(failed, "single", cols.get("filing_code", "single")).astype(str)
+    years = np.where(failed, DEFAULT_TAX_YEAR, cols["tax_year"]) if "tax_year" in cols else None
+    found = deduction_breakpoints(*(np.nan_to_num(scored[c], nan=0.0) for c in
+                                    ("total_income", "ot_1_5_total", "ot_2_0_total")),
+                                  codes, years)
+    return {c: np.where(failed, np.nan, found[c]) for c in BREAKPOINT_COLUMNS}
+
+
+def score_chunk(chunk: pd.DataFrame, exact=False, breakpoints=False) -> pd.DataFrame:
+    """
+    Score one chunk of payroll rows. Input columns are kept as-is and the
+    computed deduction columns are added (overwriting same-named inputs);
+    a qualified_tips column adds the tips deduction (TIPS_OUTPUT_COLUMNS).
+    With exact=True premiums, limit and deduction come from the integer-cents
+    engine (rounded to the cent) instead of float arithmetic, and
+    breakpoints=True adds BREAKPOINT_COLUMNS.
+    """
+    cols = _logic_columns(chunk)
+    tips = "qualified_tips" in cols
+    scored = compute_deduction_batch(cols, include_tips=tips)
+    if exact:
+        _exact_columns(scored, cols)
+    out = chunk.copy()
+    if breakpoints:
+        scored.update(_breakpoint_columns(scored, cols))
+    for c in (OUTPUT_COLUMNS + (TIPS_OUTPUT_COLUMNS if tips else ())
+              + (BREAKPOINT_COLUMNS if breakpoints else ())):
+        out[c] = scored[c]
+    return out
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, dtype=None):
+    """
+    Yield DataFrames of at most chunk_size rows from a CSV or Parquet file.
+
+    dtype maps columns to read without type inference, e.g. {"employee": str}
+    so ids keep leading zeros and do not turn into floats in chunks with
+    blanks. Missing cells stay NaN.
+    """
+    if _is_parquet(path):
+        pq = _require_pyarrow()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            df = batch.to_pandas()
+            for c, t in (dtype or {}).items():
+                if c not in df:
+                    continue
+                col = df[c]
+                # Integer ids with nulls come back as floats: 1001.0 -> "1001"
+                if col.dtype.kind == "f" and (col.dropna() % 1 == 0).all():
+                    col = col.astype("Int64")
+                df[c] = col.astype(t).where(col.notna())
+            yield df
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=dtype)
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file as they are produced."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._parquet = _is_parquet(path)
+        self._writer = None
+        self._pq = _require_pyarrow() if self._parquet else None
+
+    def write(self, df: pd.DataFrame):
+        if self._parquet:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = self._pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, mode="w" if self.rows == 0 else "a",
+                      header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def write_csv_text(self, text: str, rows: int):
+        """Append a chunk already rendered to CSV text (header included on the first one)."""
+        with open(self.path, "w" if self.rows == 0 else "a", newline="") as f:
+            f.write(text)
+        self.rows += rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardResult(NamedTuple):
+    index: int
+    rows: int
+    errors: int
+    payload: Union[str, pd.DataFrame]  # rendered CSV text, or the scored frame for Parquet
+    seconds: float
+    pid: int
+
+
+def _score_shard(index, chunk, render_csv, exact=False, breakpoints=False):
+    """Score one shard (runs inside a pool worker when workers > 1)."""
+    start = time.perf_counter()
+    scored = score_chunk(chunk, exact, breakpoints)
+    errors = int((scored["error"] != "").sum())
+    # Rendering CSV is the most expensive step, so it happens in the worker too
+    payload = scored.to_csv(index=False, header=index == 0) if render_csv else scored
+    return ShardResult(index, len(scored), errors, payload,
+                       time.perf_counter() - start, os.getpid())
+
+
+def score_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+               workers=1, exact=False, breakpoints=False):
+    """
+    Stream input_path through score_chunk into output_path (exact and
+    breakpoints are passed on to score_chunk).
+
+    With workers > 1 the chunks are scored on a process pool. At most
+    2 × workers shards are in flight at once, and results are written strictly
+    in input order, so the output is identical to a single-process run.
+
+    progress, if given, is called as progress(shard_result, total_rows)
+    after every shard is written. Returns a dict with row and error counts.
+    """
+    errors = 0
+    render_csv = not _is_parquet(output_path)
+
+    with ChunkWriter(output_path) as writer:
+        def _write(result: ShardResult):
+            nonlocal errors
+            errors += result.errors
+            if render_csv:
+                writer.write_csv_text(result.payload, result.rows)
+            else:
+                writer.write(result.payload)
+            if progress:
+                progress(result, writer.rows)
+
+        shards = enumerate(read_chunks(input_path, chunk_size))
+        if workers <= 1:
+            for i, chunk in shards:
+                _write(_score_shard(i, chunk, render_csv, exact, breakpoints))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for i, chunk in shards:
+                    pending.append(pool.submit(_score_shard, i, chunk, render_csv, exact,
+                                               breakpoints))
+                    if len(pending) >= 2 * workers:
+                        _write(pending.popleft().result())
+                while pending:
+                    _write(pending.popleft().result())
+
+    return {"rows": writer.rows, "errors": errors}
+
+
+# ─────────────────────────────────────────────────────────────
+# REPORTS
+# ─────────────────────────────────────────────────────────────
+DEFAULT_REPORT_CHUNK_SIZE = 50
+
+# Optional free-text answers copied onto the report, as in the UI's step 1
+ANSWER_COLUMNS = ("over_40", "ot_1_5x", "ss_check", "itin_check")
+
+MANIFEST_COLUMNS = ("row", "name", "file", "total_deduction", "error")
+
+
+class ReportShard(NamedTuple):
+    index: int
+    files: list      # [(archive name, PDF bytes)] in row order
+    manifest: str    # CSV lines for manifest.csv, without header
+    errors: int
+    seconds: float
+    pid: int
+
+
+def _file_stem(name):
+    stem = "".join(c if c.isalnum() or c in "-_" else "_" for c in name.strip())
+    return stem.strip("_")[:60] or "report"
+
+
+def _render_reports(index, first_row, chunk, lang, name_column):
+    """Render one shard of rows to PDF reports (runs inside a pool worker when workers > 1)."""
+    from report import build_pdf
+    from texts import texts
+
+    start = time.perf_counter()
+    tl = texts[lang]
+    cols = _logic_columns(chunk)
+    n = len(chunk)
+    names = (chunk[name_column].fillna("").astype(str).str.strip().tolist()
+             if name_column in chunk else [""] * n)
+    regular_rate = np.nan_to_num(cols.get("regular_rate", np.zeros(n)), nan=0.0)
+
+    files, manifest, errors = [], io.StringIO(), 0
+    writer = csv.writer(manifest)
+    for i in range(n):
+        row = first_row + i
+        inputs = {c: float(np.nan_to_num(cols[c][i], nan=0.0))
+                  for c in BATCH_INPUT_COLUMNS if c in cols}
+        inputs["method"] = (cols["method"][i] if "method" in cols
+                            else "hours" if regular_rate[i] > 0 else "total")
+        code = cols["filing_code"][i] if "filing_code" in cols else "single"
+        inputs["filing_code"] = code
+        year = cols["tax_year"][i] if "tax_year" in cols else np.nan
+        inputs["tax_year"] = DEFAULT_TAX_YEAR if np.isnan(year) else year
+        if code in FILING_STATUS_CODES:
+            inputs["filing_status"] = tl["filing_status_options"][FILING_STATUS_CODES.index(code)]
+        for c in ANSWER_COLUMNS:
+            if c in chunk and pd.notna(chunk[c].iloc[i]):
+                inputs[c] = str(chunk[c].iloc[i]).strip()
+
+        name = names[i] or f"{tl['pdf_user_name']} {row}"
+        if code not in FILING_STATUS_CODES:
+            error = "error_invalid_filing_status"
+        elif inputs["tax_year"] not in TAX_YEARS:
+            error = "error_invalid_tax_year"
+        elif inputs["method"] not in ("total", "hours"):
+            error = "error_invalid_method"
+        else:
+            try:
+                results = compute_deduction(inputs, tl)
+                error = ""
+            except DeductionInputError as e:
+                error = e.code
+
+        if error:
+            errors += 1
+            writer.writerow((row, name, "", "", error))
+            continue
+        file_name = f"{row:06d}_{_file_stem(name)}.pdf"
+        files.append((file_name, build_pdf(name, [], results, lang)))
+        writer.writerow((row, name, file_name, f"{results['total_deduction']:.2f}", ""))
+
+    return ReportShard(index, files, manifest.getvalue(), errors,
+                       time.perf_counter() - start, os.getpid())
+
+
+def write_reports(input_path, output, lang="es", name_column="name",
+                  chunk_size=DEFAULT_REPORT_CHUNK_SIZE, progress=None, workers=1):
+    """
+    Render one report per row of input_path into the ZIP archive output (a
+    path or a writable binary stream, which need not be seekable).
+
+    Rows are rendered in shards of chunk_size on a process pool when
+    workers > 1, with at most 2 × workers shards in flight. Each report is
+    written to the archive as soon as its shard arrives (in input order) and
+    then dropped, and the manifest is spooled to a temporary file, so memory
+    does not grow with the number of rows. manifest.csv, written last, lists
+    every row with its file name or error key.
+
+    progress, if given, is called as progress(shard, reports_written) after
+    every shard. Returns a dict with report and error counts.
+    """
+    reports = errors = 0
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as zf, \
+            tempfile.TemporaryFile() as manifest:
+        manifest.write((",".join(MANIFEST_COLUMNS) + "\r\n").encode())
+
+        def _write(shard: ReportShard):
+            nonlocal reports, errors
+            # PDF streams are already compressed, so entries are stored as-is
+            for file_name, data in shard.files:
+                zf.writestr(file_name, data)
+            manifest.write(shard.manifest.encode())
+            reports += len(shard.files)
+            errors += shard.errors
+            if progress:
+                progress(shard, reports)
+
+        first_row = 1
+        chunks = enumerate(read_chunks(input_path, chunk_size))
+        if workers <= 1:
+            for i, chunk in chunks:
+                _write(_render_reports(i, first_row, chunk, lang, name_column))
+                first_row += len(chunk)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for i, chunk in chunks:
+                    pending.append(pool.submit(_render_reports, i, first_row, chunk,
+                                               lang, name_column))
+                    first_row += len(chunk)
+                    if len(pending) >= 2 * workers:
+                        _write(pending.popleft().result())
+                while pending:
+                    _write(pending.popleft().result())
+
+        manifest.seek(0)
+        with zf.open("manifest.csv", "w") as entry:
+            shutil.copyfileobj(manifest, entry)
+
+    return {"reports": reports, "errors": errors}
+
+
+# ─────────────────────────────────────────────────────────────
+# PUNCHES
+# ─────────────────────────────────────────────────────────────
+def hours_from_punches(punch_path, output_path, rules=None, payroll_path=None, on="employee",
+                       weekly_path=None, chunk_size=None, progress=None):
+    """
+    Derive Option B hours from a punch file (see punches.py).
+
+    Writes the per-employee hours to output_path or, with payroll_path, the
+    payroll rows with ot_hours_1_5 / dt_hours_2_0 filled in for the employees
+    found in the punches (ready for the score command). weekly_path, if given,
+    also receives the per-workweek breakdown. Returns the ingestion stats.
+    """
+    import punches
+
+    weekly, stats = punches.ingest_punches(
+        punch_path, rules or punches.FLSA,
+        chunk_size=chunk_size or punches.DEFAULT_PUNCH_CHUNK_SIZE, progress=progress)
+    hours = punches.employee_hours(weekly)
+    if weekly_path:
+        with ChunkWriter(weekly_path) as writer:
+            writer.write(weekly)
+
+    with ChunkWriter(output_path) as writer:
+        if payroll_path is None:
+            writer.write(hours)
+        else:
+            matched = 0
+            for chunk in read_chunks(payroll_path, dtype={on: str}):
+                merged = punches.apply_to_payroll(chunk, hours, on=on)
+                matched += int(chunk[on].astype(str).isin(hours["employee"]).sum())
+                writer.write(merged)
+            stats["payroll_rows"] = writer.rows
+            stats["payroll_matched"] = matched
+    return stats
+
+
+# ─────────────────────────────────────────────────────────────
+# PAY STUBS
+# ─────────────────────────────────────────────────────────────
+def ytd_from_paystubs(input_path, output_path, periods_path=None,
+                      chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Stream pay periods through paystubs.flag_periods and write the
+    year-to-date totals per employee to output_path (and, with periods_path,
+    every flagged period). Returns a dict with period, employee, mismatch
+    and error counts.
+    """
+    import paystubs
+
+    acc = paystubs.YTDAccumulator()
+    periods = mismatches = errors = 0
+    writer = ChunkWriter(periods_path) if periods_path else None
+    try:
+        for chunk in read_chunks(input_path, chunk_size, dtype={"employee": str}):
+            flagged = paystubs.flag_periods(chunk)
+            acc.add(flagged)
+            periods += len(flagged)
+            mismatches += int((flagged["mismatch_1_5"] | flagged["mismatch_2_0"]).sum())
+            errors += int((flagged["error"] != "").sum())
+            if writer:
+                writer.write(flagged)
+            if progress:
+                progress(periods)
+    finally:
+        if writer:
+            writer.close()
+
+    totals = acc.totals()
+    with ChunkWriter(output_path) as out:
+        out.write(totals)
+    return {"periods": periods, "employees": len(totals), "mismatches": mismatches,
+            "errors": errors}
+
+
+# ─────────────────────────────────────────────────────────────
+# PROJECTION
+# ─────────────────────────────────────────────────────────────
+DEFAULT_PROJECTION_CHUNK_SIZE = 1_000
+DEFAULT_PERIODS_PER_YEAR = 26
+
+
+def project_chunk(chunk: pd.DataFrame, draws, rng_seed, periods_per_year=DEFAULT_PERIODS_PER_YEAR,
+                  model=None) -> pd.DataFrame:
+    """
+    Project the year-end deduction of one chunk of year-to-date rows (see
+    projection.py for the columns). Rows that cannot be projected get an
+    error and NaN projections instead of stopping the run.
+    """
+    from projection import ProjectionModel, project_deduction
+
+    cols = _logic_columns(chunk)
+    n = len(chunk)
+
+    def _num(c, default=0.0):
+        if c not in chunk:
+            return np.full(n, default)
+        return pd.to_numeric(chunk[c], errors="coerce").to_numpy(dtype=np.float64)
+
+    ytd_income = np.nan_to_num(_num("ytd_income"), nan=0.0)
+    elapsed = np.nan_to_num(_num("periods"), nan=0.0)
+    per_year = _num("periods_per_year", periods_per_year)
+    per_year = np.where(np.isnan(per_year), periods_per_year, per_year)
+    codes = cols.get("filing_code", np.full(n, "single", dtype=object))
+    years = cols.get("tax_year", np.full(n, np.nan))
+
+    error = np.select(
+        [~np.isin(codes, FILING_STATUS_CODES),
+         np.isin(codes, INELIGIBLE_FILING_CODES),
+         ~(np.isnan(years) | np.isin(years, TAX_YEARS)),
+         ytd_income <= 0,
+         (elapsed <= 0) | (elapsed > per_year)],
+        ["error_invalid_filing_status", "error_ineligible_filing_status",
+         "error_invalid_tax_year", "error_missing_total_income", "error_invalid_periods"],
+        default="",
+    )
+    failed = error != ""
+    projected = project_deduction(
+        np.where(failed, 0.0, ytd_income),
+        np.where(failed, 0.0, np.nan_to_num(_num("ot_1_5_total"), nan=0.0)),
+        np.where(failed, 0.0, np.nan_to_num(_num("ot_2_0_total"), nan=0.0)),
+        np.where(failed, 1.0, elapsed), np.where(failed, 1.0, per_year),
+        np.where(failed, "single", codes).astype(str), np.where(failed, np.nan, years),
+        draws=draws, seed=rng_seed, model=model or ProjectionModel(),
+    )
+    out = chunk.copy()
+    for c, values in projected.items():
+        out[c] = np.where(failed, np.nan, values)
+    out["error"] = error
+    return out
+
+
+def project_file(input_path, output_path, draws, seed=None, periods_per_year=DEFAULT_PERIODS_PER_YEAR,
+                 model=None, chunk_size=DEFAULT_PROJECTION_CHUNK_SIZE, progress=None):
+    """
+    Stream year-to-date rows through project_chunk into output_path. Every
+    chunk draws from its own child of np.random.SeedSequence(seed), so a run
+    is reproducible for a given seed and chunk size. Returns a dict with row
+    and error counts.
+    """
+    seeds = np.random.SeedSequence(seed)
+    errors = 0
+    with ChunkWriter(output_path) as writer:
+        for chunk in read_chunks(input_path, chunk_size, dtype={"employee": str}):
+            projected = project_chunk(chunk, draws, seeds.spawn(1)[0], periods_per_year, model)
+            errors += int((projected["error"] != "").sum())
+            writer.write(projected)
+            if progress:
+                progress(writer.rows)
+    return {"rows": writer.rows, "errors": errors}
+
+
+# ─────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="batch.py",
+        description="Batch tools for the OBBB qualified overtime deduction.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    score = sub.add_parser(
+        "score",
+        help="Score every row of a payroll CSV/Parquet file.",
+        description=(
+            "Input columns: total_income (or magi), filing_status "
+            f"({', '.join(FILING_STATUS_CODES)} or the UI label), tax_year "
+            f"({TAX_YEARS[0]}-{TAX_YEARS[-1]}, default {DEFAULT_TAX_YEAR}), method (total|hours, "
+            "optional), ot_1_5_total, ot_2_0_total for Option A; regular_rate, "
+            "actual_rate_1_5, actual_rate_2_0, ot_hours_1_5, dt_hours_2_0, "
+            "ytd_override_1_5, ytd_override_2_0 for Option B; qualified_tips adds the "
+            "tips deduction. Other columns are passed through."
+        ),
+    )
+    score.add_argument("input", help="Input .csv or .parquet file")
+    score.add_argument("output", help="Output .csv or .parquet file")
+    score.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f"Rows per chunk (default: {DEFAULT_CHUNK_SIZE})")
+    score.add_argument("--workers", type=int, default=1,
+                       help="Worker processes (default: 1; 0 = one per CPU core)")
+    score.add_argument("--exact", action="store_true",
+                       help="Compute premiums, limit and deduction in integer cents")
+    score.add_argument("--breakpoints", action="store_true",
+                       help="Add the MAGI and extra overtime at which the deduction stops growing")
+    score.add_argument("--quiet", action="store_true", help="Do not report progress")
+
+    reports = sub.add_parser(
+        "reports",
+        help="Render one PDF report per row of a payroll CSV/Parquet file into a ZIP.",
+        description=(
+            "Takes the same input columns as 'score', plus an optional name column "
+            "printed on each report and used in its file name, and optional "
+            f"{', '.join(ANSWER_COLUMNS)} answers. Rows that cannot be calculated get "
+            "no report; manifest.csv in the archive lists every row with its file "
+            "or error."
+        ),
+    )
+    reports.add_argument("input", help="Input .csv or .parquet file")
+    reports.add_argument("output", help="Output .zip file ('-' for stdout)")
+    reports.add_argument("--lang", choices=("es", "en"), default="es",
+                         help="Report language (default: es)")
+    reports.add_argument("--name-column", default="name",
+                         help="Column with the employee name (default: name)")
+    reports.add_argument("--chunk-size", type=int, default=DEFAULT_REPORT_CHUNK_SIZE,
+                         help=f"Reports per shard (default: {DEFAULT_REPORT_CHUNK_SIZE})")
+    reports.add_argument("--workers", type=int, default=1,
+                         help="Worker processes (default: 1; 0 = one per CPU core)")
+    reports.add_argument("--quiet", action="store_true", help="Do not report progress")
+
+    punch = sub.add_parser(
+        "punches",
+        help="Derive Option B overtime hours from time-clock punches.",
+        description=(
+            "Input columns: employee, clock_in, clock_out (one row per punch, any order). "
+            "Groups punches into workweeks and writes per-employee regular_hours, "
+            "ot_hours_1_5 and dt_hours_2_0, or fills those into a payroll file."
+        ),
+    )
+    punch.add_argument("input", help="Punch .csv or .parquet file")
+    punch.add_argument("output", help="Output .csv or .parquet file")
+    punch.add_argument("--payroll", help="Payroll file to fill with the hours (written to output)")
+    punch.add_argument("--on", default="employee",
+                       help="Payroll column matching the punch employee ids (default: employee)")
+    punch.add_argument("--weekly", help="Also write the per-workweek breakdown to this file")
+    punch.add_argument("--weekly-ot", type=float, default=40.0,
+                       help="Workweek hours paid at 1.5x beyond (default: 40)")
+    punch.add_argument("--daily-ot", type=float,
+                       help="Workday hours paid at 1.5x beyond (default: no daily rule)")
+    punch.add_argument("--daily-dt", type=float,
+                       help="Workday hours paid at 2.0x beyond (default: no daily rule)")
+    punch.add_argument("--week-start", choices=WEEKDAYS, default="sun",
+                       help="First day of the workweek (default: sun)")
+    punch.add_argument("--day-start-hour", type=int, default=0,
+                       help="Hour at which workdays start (default: 0)")
+    punch.add_argument("--chunk-size", type=int, help="Punches per chunk")
+    punch.add_argument("--quiet", action="store_true", help="Do not report progress")
+
+    stubs = sub.add_parser(
+        "paystubs",
+        help="Year-to-date overtime per employee from per-period pay stubs.",
+        description=(
+            "Input columns: employee, period, regular_rate, ot_rate_1_5, ot_hours_1_5, "
+            "ot_paid_1_5, ot_rate_2_0, dt_hours_2_0, ot_paid_2_0 (missing ones count as 0). "
+            "Flags rate mismatches per period and sums premiums per employee."
+        ),
+    )
+    stubs.add_argument("input", help="Pay-period .csv or .parquet file")
+    stubs.add_argument("output", help="Per-employee year-to-date .csv or .parquet file")
+    stubs.add_argument("--periods", help="Also write every flagged period to this file")
+    stubs.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f"Periods per chunk (default: {DEFAULT_CHUNK_SIZE})")
+    stubs.add_argument("--quiet", action="store_true", help="Do not report progress")
+
+    project = sub.add_parser(
+        "project",
+        help="Monte Carlo year-end deduction percentiles from year-to-date pay.",
+        description=(
+            "Input columns: ytd_income (income so far, overtime included), ot_1_5_total, "
+            "ot_2_0_total (overtime paid so far), periods (pay periods elapsed), and "
+            "optionally periods_per_year, filing_status and tax_year. The output of "
+            "'paystubs' plus a ytd_income column works as input."
+        ),
+    )
+    project.add_argument("input", help="Year-to-date .csv or .parquet file")
+    project.add_argument("output", help="Output .csv or .parquet file")
+    project.add_argument("--draws", type=int, default=10_000,
+                         help="Simulated years per employee (default: 10000)")
+    project.add_argument("--seed", type=int, help="Random seed (default: fresh entropy)")
+    project.add_argument("--periods-per-year", type=int, default=DEFAULT_PERIODS_PER_YEAR,
+                         help=f"Pay periods per year when the column is missing "
+                              f"(default: {DEFAULT_PERIODS_PER_YEAR})")
+    project.add_argument("--income-cv", type=float, default=0.10,
+                         help="Per-period variation of base pay (default: 0.10)")
+    project.add_argument("--ot-cv", type=float, default=0.60,
+                         help="Per-period variation of overtime pay (default: 0.60)")
+    project.add_argument("--chunk-size", type=int, default=DEFAULT_PROJECTION_CHUNK_SIZE,
+                         help=f"Employees per chunk (default: {DEFAULT_PROJECTION_CHUNK_SIZE})")
+    project.add_argument("--quiet", action="store_true", help="Do not report progress")
+    return parser
+
+
+def main(argv=None):
+    args = _build_parser().parse_args(argv)
+
+    if args.command == "score":
+        workers = args.workers or os.cpu_count() or 1
+        start = time.perf_counter()
+
+        def _progress(shard, total):
+            elapsed = time.perf_counter() - start
+            print(f"shard {shard.index + 1}: {shard.rows} rows in {shard.seconds:.2f}s "
+                  f"(pid {shard.pid}) — {total} total, {total / elapsed:,.0f} rows/s",
+                  file=sys.stderr)
+
+        stats = score_file(args.input, args.output, args.chunk_size,
+                           progress=None if args.quiet else _progress, workers=workers,
+                           exact=args.exact, breakpoints=args.breakpoints)
+        print(f"Scored {stats['rows']} rows ({stats['errors']} with errors) "
+              f"in {time.perf_counter() - start:.1f}s → {args.output}", file=sys.stderr)
+
+    elif args.command == "reports":
+        workers = args.workers or os.cpu_count() or 1
+        start = time.perf_counter()
+
+        def _progress(shard, total):
+            elapsed = time.perf_counter() - start
+            print(f"shard {shard.index + 1}: {len(shard.files)} reports in {shard.seconds:.2f}s "
+                  f"(pid {shard.pid}) — {total} total, {total / elapsed:,.1f} reports/s",
+                  file=sys.stderr)
+
+        output = sys.stdout.buffer if args.output == "-" else args.output
+        stats = write_reports(args.input, output, args.lang, args.name_column, args.chunk_size,
+                              progress=None if args.quiet else _progress, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"Wrote {stats['reports']} reports ({stats['errors']} rows with errors) "
+              f"in {elapsed:.1f}s, {stats['reports'] / elapsed:,.1f} reports/s → {args.output}",
+              file=sys.stderr)
+
+    elif args.command == "punches":
+        from punches import OvertimeRules
+
+        rules = OvertimeRules(weekly_ot_after=args.weekly_ot, daily_ot_after=args.daily_ot,
+                              daily_dt_after=args.daily_dt,
+                              week_start=WEEKDAYS.index(args.week_start),
+                              day_start_hour=args.day_start_hour)
+        start = time.perf_counter()
+
+        def _progress(total):
+            elapsed = time.perf_counter() - start
+            print(f"{total:,} punches — {total / elapsed:,.0f} punches/s", file=sys.stderr)
+
+        stats = hours_from_punches(args.input, args.output, rules, args.payroll, args.on,
+                                   args.weekly, args.chunk_size,
+                                   progress=None if args.quiet else _progress)
+        print(f"Read {stats['punches']:,} punches ({stats['skipped']:,} skipped) for "
+              f"{stats['employees']:,} employees in {stats['weeks']:,} workweeks "
+              f"in {time.perf_counter() - start:.1f}s → {args.output}", file=sys.stderr)
+        if args.payroll:
+            print(f"Filled hours for {stats['payroll_matched']:,} of "
+                  f"{stats['payroll_rows']:,} payroll rows", file=sys.stderr)
+
+    elif args.command == "paystubs":
+        start = time.perf_counter()
+
+        def _progress(total):
+            elapsed = time.perf_counter() - start
+            print(f"{total:,} periods — {total / elapsed:,.0f} periods/s", file=sys.stderr)
+
+        stats = ytd_from_paystubs(args.input, args.output, args.periods, args.chunk_size,
+                                  progress=None if args.quiet else _progress)
+        print(f"Aggregated {stats['periods']:,} periods for {stats['employees']:,} employees "
+              f"({stats['mismatches']:,} with rate mismatches, {stats['errors']:,} with errors) "
+              f"in {time.perf_counter() - start:.1f}s → {args.output}", file=sys.stderr)
+
+    elif args.command == "project":
+        from projection import ProjectionModel
+
+        start = time.perf_counter()
+
+        def _progress(total):
+            elapsed = time.perf_counter() - start
+            print(f"{total:,} employees — {total / elapsed:,.0f} employees/s", file=sys.stderr)
+
+        stats = project_file(args.input, args.output, args.draws, args.seed, args.periods_per_year,
+                             ProjectionModel(args.income_cv, args.ot_cv), args.chunk_size,
+                             progress=None if args.quiet else _progress)
+        print(f"Projected {stats['rows']:,} employees × {args.draws:,} draws "
+              f"({stats['errors']:,} with errors) in {time.perf_counter() - start:.1f}s "
+              f"→ {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
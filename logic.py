@@ -1,5 +1,76 @@
-﻿import math
-from typing import Literal
+﻿from __future__ import annotations
+
+import functools
+import math
+from typing import Literal, NamedTuple
+
+from startup import lazy_module
+
+# NumPy solo se carga al usar las funciones por lotes (la UI no lo necesita al arrancar)
+np = lazy_module("numpy")
+
+# Códigos de estado civil en el mismo orden que "filing_status_options" de la UI
+FILING_STATUS_CODES = ("single", "hoh", "mfj", "mfs")
+
+# Estados civiles sin derecho a la deducción: el Paso 1 de la UI no deja continuar
+# a casados que declaran por separado. Sus filas en las tablas solo completan el índice.
+INELIGIBLE_FILING_CODES = ("mfs",)
+
+# (max_value, phase_start, phase_range) por estado civil
+PHASEOUT_LIMITS = {
+    "single": (12500, 150000, 125000),
+    "hoh":    (12500, 150000, 125000),
+    "mfj":    (25000, 300000, 250000),
+    "mfs":    (12500, 150000, 125000),
+}
+
+# Años fiscales con deducción (consecutivos: el índice de un año es year - TAX_YEARS[0])
+TAX_YEARS = (2025, 2026, 2027, 2028)
+DEFAULT_TAX_YEAR = 2025
+
+# Versión de TAX_PARAMS y TIPS_PARAMS; cambiarla al corregir o agregar parámetros
+TAX_PARAMS_VERSION = "2025.2"
+
+# (max_value, phase_start, phase_range) por (año fiscal, estado civil).
+# La ley no ajusta estos montos por inflación, así que cada año repite PHASEOUT_LIMITS.
+TAX_PARAMS = {
+    (year, code): PHASEOUT_LIMITS[code]
+    for year in TAX_YEARS
+    for code in FILING_STATUS_CODES
+}
+
+# Propinas calificadas: tope de $25,000 por declaración (también la conjunta), que
+# baja $100 por cada $1,000 de MAGI sobre el umbral → phase_range = 250,000
+TIPS_PHASEOUT_LIMITS = {
+    "single": (25000, 150000, 250000),
+    "hoh":    (25000, 150000, 250000),
+    "mfj":    (25000, 300000, 250000),
+    "mfs":    (25000, 150000, 250000),
+}
+
+TIPS_PARAMS = {
+    (year, code): TIPS_PHASEOUT_LIMITS[code]
+    for year in TAX_YEARS
+    for code in FILING_STATUS_CODES
+}
+
+# Tablas de parámetros por deducción (argumento kind de phaseout_params y phaseout_table)
+DEDUCTION_PARAMS = {
+    "overtime": TAX_PARAMS,
+    "tips":     TIPS_PARAMS,
+}
+
+_AMOUNT_TYPES = ("total", "premium", "unknown")
+
+OT_RATE_TOLERANCE = 0.01  # 1% tolerance for rate mismatch
+
+# Etiquetas por defecto para compute_deduction; la UI pasa las del idioma activo
+DEFAULT_LABELS = {
+    "method_total":       "By total amount paid (Option A)",
+    "method_hours":       "By hours worked (Option B)",
+    "data_mismatch_none": "None",
+    "data_mismatch_both": "1.5× and 2.0×",
+}
 
 def calculate_ot_premium(
     ot_amount: float,
@@ -82,4 +153,886 @@ def apply_phaseout(
     reduction_ratio = (magi - phase_start) / phase_range
     allowed = max_value * (1 - reduction_ratio)
 
-    return max(0.0, math.floor(allowed))
\ No newline at end of file
+    return max(0.0, math.floor(allowed))
+
+
+# ─────────────────────────────────────────────────────────────
+# CÁLCULO COMPLETO DE LA DEDUCCIÓN (sin UI)
+# ─────────────────────────────────────────────────────────────
+class DeductionInputError(ValueError):
+    """
+    Entrada inválida para compute_deduction.
+
+    El atributo `code` es la clave del texto de error en la UI
+    (p. ej. "error_empty_option_a").
+    """
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+def phaseout_params(tax_year=None, filing_code=None, kind="overtime") -> tuple:
+    """
+    (max_value, phase_start, phase_range) para un año fiscal y código de estado
+    civil; None toma DEFAULT_TAX_YEAR y "single". kind elige la tabla de
+    DEDUCTION_PARAMS ("overtime" → TAX_PARAMS, "tips" → TIPS_PARAMS).
+
+    Lanza ValueError si el año o el estado civil no están en la tabla.
+    """
+    year = DEFAULT_TAX_YEAR if tax_year is None else tax_year
+    code = filing_code or "single"
+    try:
+        return DEDUCTION_PARAMS[kind][(year, code)]
+    except (KeyError, TypeError):
+        if year not in TAX_YEARS:
+            raise ValueError(f"Año fiscal inválido: {tax_year!r}. Usa uno de {TAX_YEARS}.") from None
+        raise ValueError(f"Estado civil inválido: {filing_code!r}. Usa uno de {FILING_STATUS_CODES}.") from None
+
+
+def calculate_tips_deduction(qualified_tips: float, magi: float, filing_code=None, tax_year=None) -> float:
+    """
+    Deducción por propinas calificadas: las propinas hasta el límite de
+    TIPS_PARAMS después del phase-out (mismo apply_phaseout que el overtime).
+
+    Ejemplos (single, 2025):
+    - 8,000 en propinas con MAGI 100,000 → 8000
+    - 30,000 en propinas con MAGI 100,000 → 25000 (tope)
+    - 30,000 en propinas con MAGI 250,000 → 15000 (25,000 − $100 × 100)
+    """
+    max_value, phase_start, phase_range = phaseout_params(tax_year, filing_code, "tips")
+    limit = apply_phaseout(magi=magi, max_value=max_value,
+                           phase_start=phase_start, phase_range=phase_range)
+    return min(max(float(qualified_tips or 0.0), 0.0), limit)
+
+
+def is_rate_mismatch(actual: float, expected: float,
+                     tolerance: float = OT_RATE_TOLERANCE) -> bool:
+    """
+    Indica si la tarifa real difiere de la esperada más allá de la tolerancia.
+    Si alguna de las dos tarifas es 0 (no informada) no hay diferencia.
+    """
+    return (actual > 0 and expected > 0 and
+            abs(actual - expected) / expected > tolerance)
+
+
+def compute_deduction(inputs: dict, labels: dict = None) -> dict:
+    """
+    Calcula la deducción completa (Opción A u Opción B) a partir de los datos
+    de los pasos 1–3, sin depender de Streamlit.
+
+    Parámetros:
+    - inputs: Diccionario con las claves
+        "method"        → "total" (Opción A) u "hours" (Opción B)
+        "total_income"  → MAGI estimado
+        "filing_code"   → código de estado civil (ver FILING_STATUS_CODES)
+        "tax_year"      → año fiscal (ver TAX_YEARS; opcional, DEFAULT_TAX_YEAR)
+        Opción A: "ot_1_5_total", "ot_2_0_total"
+        Opción B: "regular_rate", "actual_rate_1_5", "actual_rate_2_0",
+                  "ot_hours_1_5", "dt_hours_2_0", "ytd_override_1_5", "ytd_override_2_0"
+        Opcionales (solo se copian al resultado): "filing_status", "over_40",
+                  "ot_1_5x", "ss_check", "itin_check"
+      Las claves numéricas ausentes se toman como 0.
+    - labels: Textos para "method_used" y "rate_mismatch_label"
+      (claves de DEFAULT_LABELS). La UI pasa el diccionario de textos del idioma.
+
+    Retorna:
+    - El diccionario de resultados que consumen la pestaña de datos y build_pdf.
+
+    Lanza DeductionInputError con la clave del mensaje de error si los datos
+    no permiten calcular.
+    """
+    labels = {**DEFAULT_LABELS, **(labels or {})}
+
+    def _num(key):
+        return inputs.get(key) or 0.0
+
+    if inputs.get("filing_code") in INELIGIBLE_FILING_CODES:
+        raise DeductionInputError("error_ineligible_filing_status")
+
+    total_income = _num("total_income")
+    if total_income <= 0:
+        raise DeductionInputError("error_missing_total_income")
+
+    regular_rate = ot_hours_1_5 = dt_hours_2_0 = 0.0
+    actual_rate_1_5 = actual_rate_2_0 = 0.0
+    expected_rate_1_5 = expected_rate_2_0 = 0.0
+    ytd_override_1_5 = ytd_override_2_0 = 0.0
+    mismatch_1_5 = mismatch_2_0 = False
+    rate_1_5 = rate_2_0 = 0.0
+
+    if inputs.get("method") == "total":
+        ot_1_5_total = _num("ot_1_5_total")
+        ot_2_0_total = _num("ot_2_0_total")
+        if not (ot_1_5_total > 0 or ot_2_0_total > 0):
+            raise DeductionInputError("error_empty_option_a")
+        method_used = labels["method_total"]
+        rate_mismatch_label = "--"
+
+    elif inputs.get("method") == "hours":
+        regular_rate     = _num("regular_rate")
+        actual_rate_1_5  = _num("actual_rate_1_5")
+        actual_rate_2_0  = _num("actual_rate_2_0")
+        ot_hours_1_5     = _num("ot_hours_1_5")
+        dt_hours_2_0     = _num("dt_hours_2_0")
+        if not (regular_rate > 0 and (ot_hours_1_5 + dt_hours_2_0) > 0):
+            raise DeductionInputError("error_empty_option_b")
+
+        expected_rate_1_5 = regular_rate * 1.5
+        expected_rate_2_0 = regular_rate * 2.0
+        mismatch_1_5 = is_rate_mismatch(actual_rate_1_5, expected_rate_1_5)
+        mismatch_2_0 = is_rate_mismatch(actual_rate_2_0, expected_rate_2_0)
+
+        # Los totales del recibo solo cuentan cuando hay diferencia de tarifa
+        if mismatch_1_5:
+            ytd_override_1_5 = _num("ytd_override_1_5")
+            if ytd_override_1_5 <= 0:
+                raise DeductionInputError("error_ytd_required_1_5")
+        if mismatch_2_0:
+            ytd_override_2_0 = _num("ytd_override_2_0")
+            if ytd_override_2_0 <= 0:
+                raise DeductionInputError("error_ytd_required_2_0")
+
+        method_used = labels["method_hours"]
+        rate_1_5    = actual_rate_1_5 if actual_rate_1_5 > 0 else regular_rate * 1.5
+        rate_2_0    = actual_rate_2_0 if actual_rate_2_0 > 0 else regular_rate * 2.0
+
+        ot_1_5_total = ytd_override_1_5 if mismatch_1_5 else ot_hours_1_5 * rate_1_5
+        ot_2_0_total = ytd_override_2_0 if mismatch_2_0 else dt_hours_2_0 * rate_2_0
+
+        if mismatch_1_5 and mismatch_2_0:
+            rate_mismatch_label = labels["data_mismatch_both"]
+        elif mismatch_1_5:
+            rate_mismatch_label = "1.5×"
+        elif mismatch_2_0:
+            rate_mismatch_label = "2.0×"
+        else:
+            rate_mismatch_label = labels["data_mismatch_none"]
+
+    else:
+        raise ValueError(f"Método inválido: {inputs.get('method')!r}. Usa 'total' u 'hours'.")
+
+    ot_total_paid  = ot_1_5_total + ot_2_0_total
+    ot_1_5_premium = calculate_ot_premium(ot_1_5_total, 1.5, "total")
+    ot_2_0_premium = calculate_ot_premium(ot_2_0_total, 2.0, "total")
+    qoc_gross      = ot_1_5_premium + ot_2_0_premium
+
+    max_ded, phase_start, phase_range = phaseout_params(inputs.get("tax_year"), inputs.get("filing_code"))
+    deduction_limit = apply_phaseout(magi=total_income, max_value=max_ded,
+                                     phase_start=phase_start, phase_range=phase_range)
+    total_deduction = min(qoc_gross, deduction_limit)
+    base_salary     = total_income - ot_total_paid
+
+    if base_salary < 0:
+        raise DeductionInputError("error_income_less_than_ot")
+
+    return {
+        "total_income":      total_income,
+        "base_salary":       base_salary,
+        "ot_total_paid":     ot_total_paid,
+        "ot_1_5_total":      ot_1_5_total,
+        "ot_2_0_total":      ot_2_0_total,
+        "ot_1_5_premium":    ot_1_5_premium,
+        "ot_2_0_premium":    ot_2_0_premium,
+        "rate_1_5":          rate_1_5,
+        "rate_2_0":          rate_2_0,
+        "method_used":       method_used,
+        "over_40":           inputs.get("over_40")       or "--",
+        "ot_1_5x":           inputs.get("ot_1_5x")       or "--",
+        "ss_check":          inputs.get("ss_check")      or "--",
+        "filing_status":     inputs.get("filing_status") or "--",
+        "filing_code":       inputs.get("filing_code") or "single",
+        "tax_year":          DEFAULT_TAX_YEAR if inputs.get("tax_year") is None else inputs["tax_year"],
+        "itin_check":        inputs.get("itin_check")    or "--",
+        "qoc_gross":         qoc_gross,
+        "deduction_limit":   deduction_limit,
+        "total_deduction":   total_deduction,
+        "regular_rate":      regular_rate,
+        "ot_hours_1_5":      ot_hours_1_5,
+        "dt_hours_2_0":      dt_hours_2_0,
+        "expected_rate_1_5": expected_rate_1_5,
+        "expected_rate_2_0": expected_rate_2_0,
+        "actual_rate_1_5":   actual_rate_1_5,
+        "actual_rate_2_0":   actual_rate_2_0,
+        "mismatch_1_5":      mismatch_1_5,
+        "mismatch_2_0":      mismatch_2_0,
+        "override_total_1_5":ytd_override_1_5,
+        "override_total_2_0":ytd_override_2_0,
+        "rate_mismatch_label": rate_mismatch_label,
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# VERSIONES VECTORIZADAS (lotes con NumPy)
+# ─────────────────────────────────────────────────────────────
+def calculate_ot_premium_batch(ot_amount, multiplier, amount_type="total") -> np.ndarray:
+    """
+    Versión vectorizada de calculate_ot_premium para arreglos completos.
+
+    Parámetros:
+    - ot_amount: Arreglo (o escalar) de montos de overtime.
+    - multiplier: Arreglo (o escalar) de factores de pago; solo 1.5 y 2.0 generan prima.
+    - amount_type: "total", "premium" o "unknown", como escalar o arreglo de strings.
+
+    Retorna:
+    - Arreglo float64 con la prima deducible por fila, idéntico elemento a elemento
+      a llamar calculate_ot_premium fila por fila.
+
+    Lanza ValueError si algún amount_type no es válido (igual que la versión escalar).
+    """
+    ot = np.asarray(ot_amount, dtype=np.float64)
+    mult = np.asarray(multiplier, dtype=np.float64)
+    valid = ~(ot <= 0) & ((mult == 1.5) | (mult == 2.0))
+
+    # Como en la versión escalar, el tipo solo se valida en filas que llegan a usarlo
+    if isinstance(amount_type, str):
+        if amount_type not in _AMOUNT_TYPES and valid.any():
+            raise ValueError(f"Tipo de monto inválido: {amount_type!r}. Usa 'total', 'premium' o 'unknown'.")
+        is_premium = amount_type == "premium"
+    else:
+        types = np.asarray(amount_type)
+        invalid = ~np.isin(types, _AMOUNT_TYPES) & valid
+        if invalid.any():
+            bad = str(np.broadcast_to(types, invalid.shape)[invalid].flat[0])
+            raise ValueError(f"Tipo de monto inválido: {bad!r}. Usa 'total', 'premium' o 'unknown'.")
+        is_premium = types == "premium"
+
+    # Mismo orden de operaciones que la versión escalar para obtener bits idénticos
+    with np.errstate(divide="ignore", invalid="ignore"):
+        from_total = ot * (mult - 1) / mult
+    premium = np.where(is_premium, ot, from_total)
+    return np.where(valid, premium, 0.0)
+
+
+def apply_phaseout_batch(magi, max_value, phase_start, phase_range=100000.0) -> np.ndarray:
+    """
+    Versión vectorizada de apply_phaseout.
+
+    Parámetros:
+    - magi: Arreglo de MAGI estimados.
+    - max_value, phase_start, phase_range: Escalares o arreglos que se difunden
+      (broadcast) contra magi; ver phaseout_limits_batch para obtenerlos por estado civil.
+
+    Retorna:
+    - Arreglo float64 con la deducción permitida tras el phase-out, con el mismo
+      redondeo hacia abajo (math.floor) que la versión escalar.
+    """
+    max_value = np.asarray(max_value, dtype=np.float64)
+    phase_start = np.asarray(phase_start, dtype=np.float64)
+    phase_range = np.asarray(phase_range, dtype=np.float64)
+    return _phaseout_curve(np.asarray(magi, dtype=np.float64), max_value, np.floor(max_value),
+                           phase_start, phase_range, phase_start + phase_range)
+
+
+def _phaseout_curve(magi, max_value, max_floor, phase_start, phase_range, phase_end):
+    # Curva por tramos con los quiebres ya calculados: floor(max) hasta
+    # phase_start, recta hasta phase_end y 0 después (sin ramas por fila)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reduction_ratio = (magi - phase_start) / phase_range
+        allowed = np.maximum(0.0, np.floor(max_value * (1 - reduction_ratio)))
+
+    out = np.where(magi >= phase_end, 0.0, allowed)
+    out = np.where(phase_range <= 0, 0.0, out)
+    return np.where(magi <= phase_start, max_floor, out)
+
+
+class PhaseoutTable(NamedTuple):
+    """Parámetros como arreglos float64 de forma (len(TAX_YEARS), len(FILING_STATUS_CODES))."""
+    max_value: np.ndarray
+    max_floor: np.ndarray    # límite con MAGI <= phase_start
+    phase_start: np.ndarray
+    phase_range: np.ndarray
+    phase_end: np.ndarray    # MAGI desde el cual el límite es 0
+
+
+@functools.lru_cache(maxsize=None)
+def phaseout_table(kind="overtime") -> PhaseoutTable:
+    """
+    Tabla de phase-out de DEDUCTION_PARAMS[kind] indexada por (año, estado
+    civil), construida una vez por proceso con los puntos de quiebre de la
+    curva precalculados. Índices: tax_year_index y filing_status_index.
+    """
+    table = DEDUCTION_PARAMS[kind]
+    params = np.array([[table[(year, code)] for code in FILING_STATUS_CODES]
+                       for year in TAX_YEARS], dtype=np.float64)
+    max_value, phase_start, phase_range = np.moveaxis(params, -1, 0)
+    return PhaseoutTable(max_value, np.floor(max_value), phase_start, phase_range,
+                         phase_start + phase_range)
+
+
+def filing_status_index(filing_status) -> np.ndarray:
+    """Posición de cada código en FILING_STATUS_CODES (int8), -1 si es desconocido."""
+    codes = np.asarray(filing_status)
+    index = np.full(codes.shape, -1, dtype=np.int8)
+    for i, code in enumerate(FILING_STATUS_CODES):
+        index[codes == code] = i
+    return index
+
+
+def tax_year_index(tax_year=None, shape=()) -> np.ndarray:
+    """
+    Posición de cada año en TAX_YEARS (intp), -1 si no está en la tabla.
+    None y los NaN toman DEFAULT_TAX_YEAR; None devuelve un arreglo de forma shape.
+    """
+    if tax_year is None:
+        return np.full(shape, DEFAULT_TAX_YEAR - TAX_YEARS[0], dtype=np.intp)
+    years = np.asarray(tax_year, dtype=np.float64)
+    index = np.where(np.isnan(years), DEFAULT_TAX_YEAR, years) - TAX_YEARS[0]
+    valid = (index >= 0) & (index < len(TAX_YEARS)) & (index == np.floor(index))
+    return np.where(valid, index, -1).astype(np.intp)
+
+
+def _table_indices(filing_status, tax_year):
+    """Posición plana (año, estado civil) de cada fila en phaseout_table, validada."""
+    status = filing_status_index(filing_status)
+    years = tax_year_index(tax_year, status.shape)
+    if (status < 0).any():
+        bad = np.asarray(filing_status)[status < 0].flat[0].item()
+        raise ValueError(f"Estado civil inválido: {bad!r}. Usa uno de {FILING_STATUS_CODES}.")
+    if (years < 0).any():
+        bad = np.broadcast_to(np.asarray(tax_year), years.shape)[years < 0].flat[0].item()
+        raise ValueError(f"Año fiscal inválido: {bad!r}. Usa uno de {TAX_YEARS}.")
+    return _flat_index(years, status)
+
+
+def _flat_index(years, status):
+    # Un solo take por columna es más rápido que indexar [years, status]
+    return years * len(FILING_STATUS_CODES) + status
+
+
+def phaseout_limits_batch(filing_status, tax_year=None, kind="overtime"):
+    """
+    Traduce un arreglo de códigos de estado civil (ver FILING_STATUS_CODES) y,
+    opcionalmente, de años fiscales (ver tax_year_index) a los parámetros de
+    phase-out de DEDUCTION_PARAMS[kind].
+
+    Retorna:
+    - Tupla (max_value, phase_start, phase_range) de arreglos float64.
+
+    Lanza ValueError si aparece un código o un año desconocido.
+    """
+    index = _table_indices(filing_status, tax_year)
+    table = phaseout_table(kind)
+    return table.max_value.take(index), table.phase_start.take(index), table.phase_range.take(index)
+
+
+def deduction_limit_batch(magi, filing_status, tax_year=None) -> np.ndarray:
+    """
+    Límite deducible después del phase-out para cada fila, según MAGI, código
+    de estado civil y año fiscal (opcional). Equivale a apply_phaseout con los
+    límites de phaseout_params; años distintos en el mismo lote no cuestan más.
+    """
+    return _evaluate_phaseout(magi, phaseout_table(), _table_indices(filing_status, tax_year))
+
+
+@functools.lru_cache(maxsize=None)
+def _combined_table() -> PhaseoutTable:
+    # Overtime y propinas apilados: columnas de forma (2, años, estados)
+    return PhaseoutTable(*(np.stack(pair) for pair in zip(phaseout_table("overtime"),
+                                                          phaseout_table("tips"))))
+
+
+def tips_deduction_batch(qualified_tips, magi, filing_status, tax_year=None) -> np.ndarray:
+    """Versión vectorizada de calculate_tips_deduction."""
+    limit = _evaluate_phaseout(magi, phaseout_table("tips"), _table_indices(filing_status, tax_year))
+    return np.minimum(np.maximum(np.nan_to_num(np.asarray(qualified_tips, dtype=np.float64)), 0.0), limit)
+
+
+def _evaluate_phaseout(magi, table, index):
+    # Columnas (..., años, estados) → (..., filas) con un take cada una, y una
+    # sola evaluación de la curva para todas las tablas apiladas
+    columns = (np.take(c.reshape(*c.shape[:-2], -1), index, axis=-1) for c in table)
+    return _phaseout_curve(np.asarray(magi, dtype=np.float64), *columns)
+
+
+def is_rate_mismatch_batch(actual, expected, tolerance: float = OT_RATE_TOLERANCE) -> np.ndarray:
+    """
+    Versión vectorizada de is_rate_mismatch.
+    """
+    actual = np.asarray(actual, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (actual > 0) & (expected > 0) & (np.abs(actual - expected) / expected > tolerance)
+
+
+# Columnas numéricas que acepta compute_deduction_batch (las ausentes valen 0)
+BATCH_INPUT_COLUMNS = (
+    "total_income", "ot_1_5_total", "ot_2_0_total", "regular_rate",
+    "actual_rate_1_5", "actual_rate_2_0", "ot_hours_1_5", "dt_hours_2_0",
+    "ytd_override_1_5", "ytd_override_2_0", "qualified_tips",
+)
+
+
+def compute_deduction_batch(columns, include_tips: bool = False) -> dict:
+    """
+    Versión vectorizada de compute_deduction para muchas filas a la vez.
+
+    Parámetros:
+    - columns: Mapeo (dict de arreglos o DataFrame) con las mismas claves que
+      compute_deduction: "method", "filing_code", "tax_year" y las de
+      BATCH_INPUT_COLUMNS. Las columnas ausentes y los valores vacíos (NaN) se
+      toman como 0 (DEFAULT_TAX_YEAR para "tax_year"); un "method" ausente se
+      deduce por fila ("hours" si regular_rate > 0).
+    - include_tips: Calcula también la deducción por propinas ("qualified_tips")
+      en la misma pasada: ambas tablas se resuelven con un solo índice por fila
+      y el phase-out de las dos se evalúa una vez, apilado.
+
+    Retorna:
+    - Diccionario de arreglos con los campos numéricos del resultado de
+      compute_deduction más "error": la clave del error de la fila (o "" si la
+      fila es válida). Las filas con error tienen NaN en los montos.
+      Los errores extra "error_invalid_method", "error_invalid_filing_status" y
+      "error_invalid_tax_year" marcan valores desconocidos en lugar de abortar
+      todo el lote; "error_ineligible_filing_status" marca los estados civiles
+      de INELIGIBLE_FILING_CODES, igual que compute_deduction.
+      Con include_tips se agregan "qualified_tips", "tips_limit",
+      "tips_deduction" y "combined_deduction" (overtime + propinas); una fila
+      con propinas y sin overtime es válida (montos de overtime en 0).
+    """
+    n = None
+    for key in ("method", "filing_code", "tax_year", *BATCH_INPUT_COLUMNS):
+        if key in columns:
+            n = len(columns[key])
+            break
+    if n is None:
+        raise ValueError("compute_deduction_batch necesita al menos una columna de entrada.")
+
+    def _col(key):
+        if key not in columns:
+            return np.zeros(n)
+        return np.nan_to_num(np.asarray(columns[key], dtype=np.float64), nan=0.0)
+
+    total_income = _col("total_income")
+    regular_rate = _col("regular_rate")
+    qualified_tips = np.maximum(_col("qualified_tips"), 0.0) if include_tips else np.zeros(n)
+    has_tips = qualified_tips > 0
+
+    if "method" in columns:
+        method = np.asarray(columns["method"], dtype=object)
+    else:
+        method = np.where(regular_rate > 0, "hours", "total").astype(object)
+    is_a = method == "total"
+    is_b = method == "hours"
+
+    if "filing_code" in columns:
+        codes = np.asarray(columns["filing_code"], dtype=object)
+    else:
+        codes = np.full(n, "single", dtype=object)
+    status = filing_status_index(codes)
+    known_code = status >= 0
+    years = tax_year_index(columns["tax_year"] if "tax_year" in columns else None, (n,))
+    known_year = years >= 0
+
+    # Opción B: los campos solo existen para filas "hours", igual que en la UI
+    regular_rate    = np.where(is_b, regular_rate, 0.0)
+    actual_rate_1_5 = np.where(is_b, _col("actual_rate_1_5"), 0.0)
+    actual_rate_2_0 = np.where(is_b, _col("actual_rate_2_0"), 0.0)
+    ot_hours_1_5    = np.where(is_b, _col("ot_hours_1_5"), 0.0)
+    dt_hours_2_0    = np.where(is_b, _col("dt_hours_2_0"), 0.0)
+
+    expected_rate_1_5 = regular_rate * 1.5
+    expected_rate_2_0 = regular_rate * 2.0
+    mismatch_1_5 = is_b & is_rate_mismatch_batch(actual_rate_1_5, expected_rate_1_5)
+    mismatch_2_0 = is_b & is_rate_mismatch_batch(actual_rate_2_0, expected_rate_2_0)
+    ytd_override_1_5 = np.where(mismatch_1_5, _col("ytd_override_1_5"), 0.0)
+    ytd_override_2_0 = np.where(mismatch_2_0, _col("ytd_override_2_0"), 0.0)
+
+    rate_1_5 = np.where(is_b, np.where(actual_rate_1_5 > 0, actual_rate_1_5, regular_rate * 1.5), 0.0)
+    rate_2_0 = np.where(is_b, np.where(actual_rate_2_0 > 0, actual_rate_2_0, regular_rate * 2.0), 0.0)
+
+    ot_1_5_total = np.where(is_a, _col("ot_1_5_total"),
+                            np.where(mismatch_1_5, ytd_override_1_5, ot_hours_1_5 * rate_1_5))
+    ot_2_0_total = np.where(is_a, _col("ot_2_0_total"),
+                            np.where(mismatch_2_0, ytd_override_2_0, dt_hours_2_0 * rate_2_0))
+
+    ot_total_paid  = ot_1_5_total + ot_2_0_total
+    ot_1_5_premium = calculate_ot_premium_batch(ot_1_5_total, 1.5, "total")
+    ot_2_0_premium = calculate_ot_premium_batch(ot_2_0_total, 2.0, "total")
+    qoc_gross      = ot_1_5_premium + ot_2_0_premium
+
+    index = _flat_index(np.maximum(years, 0), np.maximum(status, 0))
+    if include_tips:
+        deduction_limit, tips_limit = _evaluate_phaseout(total_income, _combined_table(), index)
+    else:
+        deduction_limit = _evaluate_phaseout(total_income, phaseout_table(), index)
+    total_deduction = np.minimum(qoc_gross, deduction_limit)
+    base_salary     = total_income - ot_total_paid
+
+    # Mismo orden de validación que compute_deduction: gana el primer error
+    error = np.select(
+        [
+            ~known_code,
+            np.isin(codes, INELIGIBLE_FILING_CODES),
+            ~known_year,
+            total_income <= 0,
+            ~(is_a | is_b),
+            is_a & ~((ot_1_5_total > 0) | (ot_2_0_total > 0)) & ~has_tips,
+            is_b & ~((regular_rate > 0) & ((ot_hours_1_5 + dt_hours_2_0) > 0)) & ~has_tips,
+            mismatch_1_5 & (ytd_override_1_5 <= 0),
+            mismatch_2_0 & (ytd_override_2_0 <= 0),
+            base_salary < 0,
+        ],
+        [
+            "error_invalid_filing_status",
+            "error_ineligible_filing_status",
+            "error_invalid_tax_year",
+            "error_missing_total_income",
+            "error_invalid_method",
+            "error_empty_option_a",
+            "error_empty_option_b",
+            "error_ytd_required_1_5",
+            "error_ytd_required_2_0",
+            "error_income_less_than_ot",
+        ],
+        default="",
+    )
+    failed = error != ""
+
+    results = {
+        "total_income":      total_income,
+        "base_salary":       base_salary,
+        "ot_total_paid":     ot_total_paid,
+        "ot_1_5_total":      ot_1_5_total,
+        "ot_2_0_total":      ot_2_0_total,
+        "ot_1_5_premium":    ot_1_5_premium,
+        "ot_2_0_premium":    ot_2_0_premium,
+        "rate_1_5":          rate_1_5,
+        "rate_2_0":          rate_2_0,
+        "qoc_gross":         qoc_gross,
+        "deduction_limit":   deduction_limit,
+        "total_deduction":   total_deduction,
+        "expected_rate_1_5": expected_rate_1_5,
+        "expected_rate_2_0": expected_rate_2_0,
+    }
+    if include_tips:
+        tips_deduction = np.minimum(qualified_tips, tips_limit)
+        results["qualified_tips"]     = qualified_tips
+        results["tips_limit"]         = tips_limit
+        results["tips_deduction"]     = tips_deduction
+        results["combined_deduction"] = total_deduction + tips_deduction
+    results = {k: np.where(failed, np.nan, v) for k, v in results.items()}
+    results["mismatch_1_5"] = mismatch_1_5
+    results["mismatch_2_0"] = mismatch_2_0
+    results["error"] = error
+    return results
+
+
+# ─────────────────────────────────────────────────────────────
+# ARITMÉTICA EXACTA EN CENTAVOS
+# ─────────────────────────────────────────────────────────────
+# Redondeo (documentado; las funciones escalares y por lotes dan lo mismo):
+# - Montos de entrada → centavos enteros al centavo más cercano, mitades hacia
+#   arriba (antes se descarta el ruido de punto flotante por debajo de 1e-6 ¢,
+#   así 0.285 cuenta como 28.5 ¢ → 29 ¢).
+# - Prima "total": monto × (m - 1) / m exacto, redondeado al centavo más
+#   cercano (mitades hacia arriba; con 1.5× nunca hay mitades).
+# - Phase-out: floor exacto en dólares enteros, como math.floor en
+#   apply_phaseout pero sin el error de redondeo del cociente en flotante.
+# Frente a la ruta flotante, la prima difiere en menos de medio centavo y el
+# límite solo difiere cuando el flotante cae justo debajo de un entero.
+
+# Fracción de prima (m - 1) / m como (numerador, denominador) por multiplicador
+_PREMIUM_FRACTIONS = {1.5: (1, 3), 2.0: (1, 2)}
+
+
+def to_cents(amount: float) -> int:
+    """Dólares → centavos enteros (al centavo más cercano, mitades hacia arriba)."""
+    return math.floor(round(amount * 100, 6) + 0.5)
+
+
+def to_cents_batch(amount) -> np.ndarray:
+    """Versión vectorizada de to_cents; NaN cuenta como 0."""
+    cents = np.floor(np.round(np.asarray(amount, dtype=np.float64) * 100, 6) + 0.5)
+    return np.nan_to_num(cents, nan=0.0).astype(np.int64)
+
+
+def _div_half_up(num, den):
+    # num / den al entero más cercano, mitades hacia arriba (num >= 0, den > 0)
+    return (2 * num + den) // (2 * den)
+
+
+def calculate_ot_premium_cents(
+    ot_cents: int,
+    multiplier: float,
+    amount_type: Literal["total", "premium", "unknown"] = "total"
+) -> int:
+    """
+    calculate_ot_premium en centavos enteros, con la misma validación.
+
+    Ejemplos:
+    - 30000 ¢ @ 1.5 "total" → 10000 ¢
+    - 10001 ¢ @ 1.5 "total" → 3334 ¢ (3333.67 redondeado)
+    - 40001 ¢ @ 2.0 "total" → 20001 ¢ (20000.5, mitad hacia arriba)
+    """
+    if ot_cents <= 0 or multiplier not in _PREMIUM_FRACTIONS:
+        return 0
+    if amount_type == "premium":
+        return int(ot_cents)
+    if amount_type not in ("total", "unknown"):
+        raise ValueError(f"Tipo de monto inválido: {amount_type!r}. Usa 'total', 'premium' o 'unknown'.")
+    num, den = _PREMIUM_FRACTIONS[multiplier]
+    return _div_half_up(int(ot_cents) * num, den)
+
+
+def apply_phaseout_cents(
+    magi_cents: int,
+    max_value: float,
+    phase_start: float,
+    phase_range: float = 100000.0
+) -> int:
+    """
+    apply_phaseout con MAGI en centavos; retorna centavos (siempre dólares
+    enteros, como el floor de la versión flotante). Los parámetros van en
+    dólares, como en PHASEOUT_LIMITS.
+    """
+    max_c, start_c, range_c = to_cents(max_value), to_cents(phase_start), to_cents(phase_range)
+    if magi_cents <= start_c:
+        return (max_c // 100) * 100
+    if range_c <= 0 or magi_cents >= start_c + range_c:
+        return 0
+    # floor(max × (1 - (magi - start) / range)) en dólares, con enteros
+    return (max_c * (start_c + range_c - magi_cents) // (100 * range_c)) * 100
+
+
+def calculate_ot_premium_cents_batch(ot_cents, multiplier, amount_type="total") -> np.ndarray:
+    """
+    Versión vectorizada de calculate_ot_premium_cents (arreglos int64).
+    amount_type es un escalar, como en el uso por lotes de la deducción.
+    """
+    ot = np.asarray(ot_cents, dtype=np.int64)
+    mult = np.asarray(multiplier, dtype=np.float64)
+    if amount_type not in _AMOUNT_TYPES:
+        raise ValueError(f"Tipo de monto inválido: {amount_type!r}. Usa 'total', 'premium' o 'unknown'.")
+    if amount_type == "premium":
+        premium = ot
+    elif mult.ndim == 0:
+        num, den = _PREMIUM_FRACTIONS.get(float(mult), (0, 1))
+        premium = _div_half_up(ot * num, den)
+    else:
+        # (m - 1) / m = 1/3 con 1.5× y 1/2 con 2.0×
+        den = np.where(mult == 1.5, 3, 2)
+        premium = _div_half_up(ot, den)
+    valid = (ot > 0) & ((mult == 1.5) | (mult == 2.0))
+    return np.where(valid, premium, 0)
+
+
+def _phaseout_cents(magi, max_c, start_c, range_c):
+    # apply_phaseout_cents sobre arreglos int64, todo en centavos
+    remaining = np.minimum(np.maximum(start_c + range_c - magi, 0), range_c)
+    allowed = max_c * remaining // (100 * np.maximum(range_c, 1)) * 100
+    allowed = np.where(range_c <= 0, 0, allowed)
+    return np.where(magi <= start_c, max_c // 100 * 100, allowed)
+
+
+def apply_phaseout_cents_batch(magi_cents, max_value, phase_start, phase_range=100000.0) -> np.ndarray:
+    """
+    Versión vectorizada de apply_phaseout_cents: MAGI en centavos (int64),
+    parámetros en dólares (escalares o arreglos), resultado en centavos.
+    """
+    return _phaseout_cents(np.asarray(magi_cents, dtype=np.int64), to_cents_batch(max_value),
+                           to_cents_batch(phase_start), to_cents_batch(phase_range))
+
+
+@functools.lru_cache(maxsize=None)
+def _phaseout_table_cents(kind="overtime"):
+    # (max_value, phase_start, phase_range) de phaseout_table(kind) en centavos int64
+    table = phaseout_table(kind)
+    return tuple(to_cents_batch(c) for c in (table.max_value, table.phase_start, table.phase_range))
+
+
+def deduction_cents_batch(ot_1_5_cents, ot_2_0_cents, magi_cents, filing_status, tax_year=None) -> dict:
+    """
+    Prima QOC, límite tras phase-out y deducción final en centavos exactos
+    para muchas filas (montos de overtime "total" a 1.5× y 2.0×), con los
+    parámetros de TAX_PARAMS por estado civil y año fiscal (opcional).
+
+    Retorna un diccionario de arreglos int64: "ot_1_5_premium",
+    "ot_2_0_premium", "qoc_gross", "deduction_limit" y "total_deduction".
+    Lanza ValueError con códigos de estado civil o años desconocidos.
+    """
+    index = _table_indices(filing_status, tax_year)
+    max_c, start_c, range_c = (c.take(index) for c in _phaseout_table_cents())
+
+    ot_1_5_premium = calculate_ot_premium_cents_batch(ot_1_5_cents, 1.5)
+    ot_2_0_premium = calculate_ot_premium_cents_batch(ot_2_0_cents, 2.0)
+    qoc_gross = ot_1_5_premium + ot_2_0_premium
+    deduction_limit = _phaseout_cents(np.asarray(magi_cents, dtype=np.int64), max_c, start_c, range_c)
+    return {
+        "ot_1_5_premium":  ot_1_5_premium,
+        "ot_2_0_premium":  ot_2_0_premium,
+        "qoc_gross":       qoc_gross,
+        "deduction_limit": deduction_limit,
+        "total_deduction": np.minimum(qoc_gross, deduction_limit),
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# SENSIBILIDAD (deducción según MAGI y overtime)
+# ─────────────────────────────────────────────────────────────
+# Escalas del overtime ingresado para la curva, en % (0% a 200% de 5 en 5)
+SENSITIVITY_OT_SCALES = tuple(range(0, 205, 5))
+SENSITIVITY_MAGI_POINTS = 2001
+
+
+def deduction_sensitivity(total_income: float, qoc_gross: float, filing_code=None, tax_year=None,
+                          magi_points: int = SENSITIVITY_MAGI_POINTS,
+                          ot_scales=SENSITIVITY_OT_SCALES) -> dict:
+    """
+    Deducción final para una malla de MAGI × overtime en una sola operación
+    con arreglos, sin volver a pasar por compute_deduction.
+
+    La prima es lineal en el overtime pagado, así que escalar el overtime un
+    k% escala qoc_gross en k%. El límite se evalúa una vez por punto de MAGI
+    (apply_phaseout con los parámetros de phaseout_params) y la deducción es
+    min(qoc_gross × k, límite) para cada par.
+
+    Parámetros:
+    - total_income, qoc_gross: MAGI y prima QOC calculados para el usuario.
+    - magi_points: Puntos de MAGI, de 0 hasta pasar el fin del phase-out y el
+      doble del MAGI del usuario.
+    - ot_scales: Porcentajes del overtime ingresado (ver SENSITIVITY_OT_SCALES).
+
+    Retorna un diccionario de arreglos:
+    - "magi" (M,), "deduction_limit" (M,), "ot_scale" (K,) en %,
+      "qoc_gross" (K,) y "total_deduction" (K, M).
+    """
+    max_value, phase_start, phase_range = phaseout_params(tax_year, filing_code)
+    magi = np.linspace(0.0, max(2.0 * total_income, 1.2 * (phase_start + phase_range)), magi_points)
+    deduction_limit = apply_phaseout_batch(magi, max_value, phase_start, phase_range)
+
+    scales = np.asarray(ot_scales, dtype=np.float64)
+    qoc = qoc_gross * scales / 100
+    return {
+        "magi":            magi,
+        "deduction_limit": deduction_limit,
+        "ot_scale":        scales,
+        "qoc_gross":       qoc,
+        "total_deduction": np.minimum(qoc[:, None], deduction_limit[None, :]),
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# SOLUCIÓN INVERSA (puntos de quiebre por empleado)
+# ─────────────────────────────────────────────────────────────
+# Con el overtime fijo, la deducción min(qoc_gross, límite) deja de ser la prima
+# completa cuando el límite baja de qoc_gross, y el límite es una función por
+# tramos de MAGI: floor(max) hasta phase_start y floor(max × (fin - MAGI) /
+# rango) después. Para cada entero k ≤ floor(max):
+#
+#     límite(MAGI) ≥ k  ⟺  MAGI ≤ M_k = fin - k × rango / max
+#
+# así que cada punto de quiebre sale en forma cerrada. Los MAGI se calculan en
+# centavos enteros (como apply_phaseout_cents) y todo resultado se comprueba
+# contra las funciones directas (apply_phaseout_batch, calculate_ot_premium_batch).
+
+def _ceil_div(num, den):
+    return -(-num // den)
+
+
+def _settle_cents(cents, holds, steps=2):
+    """
+    Ajuste final al centavo contra las funciones directas: el mayor valor (en
+    centavos int64) cerca de cents para el que holds(dólares) se cumple. La
+    forma cerrada es exacta; esto solo absorbe el redondeo flotante de las
+    funciones directas justo en el borde (p. ej. 25000 × 144140 / 250000).
+    """
+    for _ in range(steps):
+        cents = np.where(holds(cents / 100), cents, cents - 1)
+    for _ in range(steps):
+        cents = np.where(holds((cents + 1) / 100), cents + 1, cents)
+    return cents
+
+
+def _max_extra_ot(magi, ot_1_5, ot_2_0, qoc, multiplier, table, index):
+    """
+    Pago extra de overtime (a multiplier) que aún suma a la deducción. El pago
+    extra sube la prima en x / d (d = 3 con 1.5×, 2 con 2.0×) y el MAGI en x:
+
+        x(k) = min(d × (k - qoc), M_k - MAGI)
+
+    con k = el límite entero que ataja la prima. x(k) crece con k hasta el
+    cruce k_r y decrece después, así que basta probar floor(k_r) y el siguiente.
+    """
+    d = 3.0 if multiplier == 1.5 else 2.0
+    max_value, max_floor, _, phase_range, phase_end = (np.take(c, index) for c in table)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = phase_range / max_value           # MAGI por dólar de límite
+        k_r = (phase_end - magi + d * qoc) / (d + slope)
+    k_lo = np.maximum(np.ceil(qoc), 1.0)
+
+    best = np.zeros(magi.shape)
+    for k in (np.floor(k_r), np.floor(k_r) + 1):
+        k = np.clip(k, k_lo, max_floor)
+        x = np.minimum(d * (k - qoc), phase_end - k * slope - magi)
+        valid = (k >= k_lo) & (k <= max_floor) & (x >= 0) & (x >= d * (k - 1 - qoc))
+        best = np.where(valid & (x > best), x, best)
+
+    def grows(extra):
+        extra = np.maximum(extra, 0.0)
+        premium = (calculate_ot_premium_batch(ot_1_5 + (extra if d == 3.0 else 0.0), 1.5)
+                   + calculate_ot_premium_batch(ot_2_0 + (extra if d == 2.0 else 0.0), 2.0))
+        return premium <= _evaluate_phaseout(magi + extra, table, index)
+
+    cents = _settle_cents(to_cents_batch(best), grows)
+    # Si ya manda el límite (o no queda prima por ganar) no hay pago extra útil
+    return np.where(grows(np.zeros(magi.shape)) & (cents > 0), cents / 100, 0.0)
+
+
+def deduction_breakpoints(total_income, ot_1_5_total, ot_2_0_total, filing_status, tax_year=None) -> dict:
+    """
+    Puntos donde total_deduction deja de crecer, por empleado y en forma cerrada
+    (sin búsqueda sobre apply_phaseout).
+
+    Parámetros:
+    - total_income: MAGI de cada empleado.
+    - ot_1_5_total, ot_2_0_total: Overtime pagado ("total") a 1.5× y 2.0×.
+    - filing_status, tax_year: Como en deduction_limit_batch.
+
+    Retorna un diccionario de arreglos:
+    - "qoc_gross", "deduction_limit": Los valores directos de partida.
+    - "qoc_headroom": Prima que todavía cabe bajo el límite con el MAGI actual.
+    - "magi_cap_binds": Mayor MAGI (al centavo) con el que qoc_gross completo
+      sigue siendo deducible; por encima manda el límite. inf si qoc_gross es
+      0 y NaN si el límite no alcanza ni sin phase-out.
+    - "magi_limit_zero": Menor MAGI (al centavo) con el que el límite llega a 0.
+    - "max_extra_ot_1_5", "max_extra_ot_2_0": Pago extra de overtime a 1.5× o
+      2.0× (que también suma al MAGI) hasta el cual la deducción sigue
+      creciendo; 0 si el límite ya manda.
+
+    Todos coinciden con las funciones directas al centavo: en el valor
+    devuelto la condición se cumple y un centavo más allá ya no.
+
+    Lanza ValueError con códigos de estado civil o años desconocidos.
+    """
+    magi = np.asarray(total_income, dtype=np.float64)
+    ot_1_5 = np.asarray(ot_1_5_total, dtype=np.float64)
+    ot_2_0 = np.asarray(ot_2_0_total, dtype=np.float64)
+    index = _table_indices(filing_status, tax_year)
+    table = phaseout_table()
+
+    def limit_at(m):
+        return _evaluate_phaseout(m, table, index)
+
+    qoc = calculate_ot_premium_batch(ot_1_5, 1.5) + calculate_ot_premium_batch(ot_2_0, 2.0)
+    limit = limit_at(magi)
+
+    # MAGI en centavos: límite(M) ≥ k ⟺ max_c × (fin_c - M) ≥ 100 × k × rango_c
+    max_c, start_c, range_c = (c.take(index) for c in _phaseout_table_cents())
+    end_c = start_c + range_c
+    k = np.ceil(qoc).astype(np.int64)
+    binds_c = _settle_cents(end_c - _ceil_div(100 * np.maximum(k, 1) * range_c, max_c),
+                            lambda m: limit_at(m) >= qoc)
+    # Último MAGI con límite positivo (k = 1), y un centavo más
+    zero_c = _settle_cents(end_c - _ceil_div(100 * range_c, max_c),
+                           lambda m: limit_at(m) > 0) + 1
+    magi_cap_binds = np.where(k > max_c // 100, np.nan, np.where(k <= 0, np.inf, binds_c / 100))
+
+    return {
+        "qoc_gross":        qoc,
+        "deduction_limit":  limit,
+        "qoc_headroom":     np.maximum(limit - qoc, 0.0),
+        "magi_cap_binds":   magi_cap_binds,
+        "magi_limit_zero":  zero_c / 100,
+        "max_extra_ot_1_5": _max_extra_ot(magi, ot_1_5, ot_2_0, qoc, 1.5, table, index),
+        "max_extra_ot_2_0": _max_extra_ot(magi, ot_1_5, ot_2_0, qoc, 2.0, table, index),
+    }
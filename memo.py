@@ -0,0 +1,96 @@
+"""
+Content-addressed memoization of calculation results and rendered reports.
+
+Users often press Calculate or Generate PDF again with the same inputs after
+moving around with the navigation bar. Both are now looked up under a
+SHA-256 digest of the normalized request first:
+
+- calculations: the calc fields plus the language labels they are rendered
+  with;
+- reports: the results, language, user name, the digests of the uploaded
+  files and the date printed on the report;
+- sensitivity curves: the MAGI, QOC, filing status and tax year they are
+  swept around.
+
+Cached reports are handles into the report store (report_store.py), which
+owns the bytes and their eviction; a handle that has since expired there is
+treated as a miss.
+"""
+import hashlib
+import json
+from datetime import date
+
+from cache import TTLCache
+from logic import DEFAULT_LABELS, compute_deduction, deduction_sensitivity
+
+CALC_CACHE_SIZE    = 4096
+REPORT_CACHE_SIZE  = 1024
+CURVE_CACHE_SIZE   = 256
+MEMO_TTL_SECONDS   = 3600
+DIGEST_CHUNK       = 1 << 20
+
+calc_results = TTLCache(maxsize=CALC_CACHE_SIZE, ttl=MEMO_TTL_SECONDS)
+report_handles = TTLCache(maxsize=REPORT_CACHE_SIZE, ttl=MEMO_TTL_SECONDS)
+sensitivity_curves = TTLCache(maxsize=CURVE_CACHE_SIZE, ttl=MEMO_TTL_SECONDS)
+
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return str(value)
+
+
+def content_key(*parts) -> str:
+    """SHA-256 of the normalized parts (numbers as floats, strings stripped, dicts sorted)."""
+    canonical = json.dumps(_normalize(parts), sort_keys=True, separators=(",", ":"),
+                           ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def file_digest(fileobj) -> str:
+    """SHA-256 of a file object's contents, read in chunks from the start."""
+    h = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(DIGEST_CHUNK), b""):
+        h.update(chunk)
+    fileobj.seek(0)
+    return h.hexdigest()
+
+
+def cached_deduction(inputs: dict, labels: dict = None) -> dict:
+    """compute_deduction, memoized on its inputs and the labels it renders with."""
+    labels = {**DEFAULT_LABELS, **(labels or {})}
+    key = content_key("calc", inputs, {k: labels[k] for k in DEFAULT_LABELS})
+    results = calc_results.get(key)
+    if results is None:
+        results = compute_deduction(inputs, labels)
+        calc_results.set(key, results)
+    return dict(results)
+
+
+def cached_sensitivity(results: dict) -> dict:
+    """deduction_sensitivity around a compute_deduction result, memoized on its inputs."""
+    args = (results["total_income"], results["qoc_gross"],
+            results.get("filing_code"), results.get("tax_year"))
+    key = content_key("sensitivity", *args)
+    curve = sensitivity_curves.get(key)
+    if curve is None:
+        curve = deduction_sensitivity(*args)
+        for values in curve.values():
+            values.flags.writeable = False  # shared between sessions
+        sensitivity_curves.set(key, curve)
+    return curve
+
+
+def report_key(results: dict, lang: str, user_name: str, upload_digests, day=None) -> str:
+    """Key of a rendered report. The day is part of it because the report prints its date."""
+    day = day or date.today().isoformat()
+    return content_key("report", results, lang, user_name, list(upload_digests), day)
@@ -0,0 +1,144 @@
+"""
+Pay-stub aggregation: per-period overtime with rate-mismatch detection.
+
+compute_deduction checks a single annual actual_rate_1_5 against
+regular_rate × 1.5, but rates change mid-year. Here every pay period is
+checked on its own (is_rate_mismatch_batch, OT_RATE_TOLERANCE) and priced the
+way the UI prices a year:
+
+- no mismatch: hours × rate paid (or the expected rate when none is given);
+- mismatch: the amount actually paid on the stub, which must then be present
+  (otherwise the period gets error_ytd_required_1_5 / _2_0 and counts 0);
+- no hours on the stub: the amount paid, taken at face value. The rate is
+  not checked, since many stubs print an overtime rate in weeks without
+  overtime.
+
+Premiums go through calculate_ot_premium_batch per period and are summed
+into year-to-date totals per employee. All of it is array arithmetic over
+the whole table, plus one bincount per summed column.
+
+Input columns (missing ones count as 0): employee, period (optional, only
+carried through), regular_rate, ot_rate_1_5, ot_hours_1_5, ot_paid_1_5,
+ot_rate_2_0, dt_hours_2_0, ot_paid_2_0. The year-to-date ot_1_5_total /
+ot_2_0_total are the Option A inputs of the score command.
+
+    python batch.py paystubs stubs.csv ytd.csv --periods flagged.csv
+"""
+import numpy as np
+import pandas as pd
+
+from logic import calculate_ot_premium_batch, is_rate_mismatch_batch
+
+STUB_NUMERIC_COLUMNS = (
+    "regular_rate", "ot_rate_1_5", "ot_hours_1_5", "ot_paid_1_5",
+    "ot_rate_2_0", "dt_hours_2_0", "ot_paid_2_0",
+)
+
+# Per-period columns summed into the year-to-date totals
+YTD_COLUMNS = (
+    "ot_hours_1_5", "dt_hours_2_0", "ot_1_5_total", "ot_2_0_total",
+    "ot_1_5_premium", "ot_2_0_premium", "mismatch_1_5", "mismatch_2_0", "error",
+)
+
+
+def _numeric(periods, col):
+    if col not in periods:
+        return np.zeros(len(periods))
+    values = pd.to_numeric(periods[col], errors="coerce").to_numpy(dtype=np.float64)
+    return np.nan_to_num(values, nan=0.0)
+
+
+def _price(regular_rate, rate, hours, paid, multiplier):
+    """(expected rate, mismatch, amount, missing paid) for one multiplier, per period."""
+    expected = regular_rate * multiplier
+    mismatch = is_rate_mismatch_batch(rate, expected) & (hours > 0)
+    from_hours = hours * np.where(rate > 0, rate, expected)
+    amount = np.where(mismatch | (hours <= 0), paid, from_hours)
+    missing = mismatch & (paid <= 0)
+    return expected, mismatch, np.where(missing, 0.0, amount), missing
+
+
+def flag_periods(periods: pd.DataFrame) -> pd.DataFrame:
+    """
+    Price and check every pay period. Returns the input columns (hours
+    coerced to numbers) plus expected_rate_1_5/_2_0, mismatch_1_5/_2_0,
+    ot_1_5_total/ot_2_0_total, ot_1_5_premium/ot_2_0_premium and error
+    ("" when the period is usable).
+    """
+    cols = {c: _numeric(periods, c) for c in STUB_NUMERIC_COLUMNS}
+    regular = cols["regular_rate"]
+
+    exp_1_5, mis_1_5, total_1_5, missing_1_5 = _price(
+        regular, cols["ot_rate_1_5"], cols["ot_hours_1_5"], cols["ot_paid_1_5"], 1.5)
+    exp_2_0, mis_2_0, total_2_0, missing_2_0 = _price(
+        regular, cols["ot_rate_2_0"], cols["dt_hours_2_0"], cols["ot_paid_2_0"], 2.0)
+
+    out = periods.copy()
+    out["ot_hours_1_5"] = cols["ot_hours_1_5"]
+    out["dt_hours_2_0"] = cols["dt_hours_2_0"]
+    out["expected_rate_1_5"] = exp_1_5
+    out["expected_rate_2_0"] = exp_2_0
+    out["mismatch_1_5"] = mis_1_5
+    out["mismatch_2_0"] = mis_2_0
+    out["ot_1_5_total"] = total_1_5
+    out["ot_2_0_total"] = total_2_0
+    out["ot_1_5_premium"] = calculate_ot_premium_batch(total_1_5, 1.5, "total")
+    out["ot_2_0_premium"] = calculate_ot_premium_batch(total_2_0, 2.0, "total")
+    out["error"] = np.select([missing_1_5, missing_2_0],
+                             ["error_ytd_required_1_5", "error_ytd_required_2_0"], default="")
+    return out
+
+
+class YTDAccumulator:
+    """
+    Year-to-date sums per employee over flagged periods, added in chunks
+    of any size and order; memory grows with employees, not periods.
+    """
+
+    def __init__(self):
+        self._codes = {}  # employee id -> row in the sums
+        self._sums = {c: np.zeros(0) for c in YTD_COLUMNS}
+        self._periods = np.zeros(0, dtype=np.int64)
+
+    def add(self, flagged: pd.DataFrame):
+        inverse, uniques = pd.factorize(flagged["employee"].fillna("").astype(str))
+        codes = np.fromiter((self._codes.setdefault(e, len(self._codes)) for e in uniques),
+                            dtype=np.int64, count=len(uniques))[inverse]
+        n = len(self._codes)
+        self._grow(n)
+        for c in YTD_COLUMNS:
+            values = (flagged[c] != "") if c == "error" else flagged[c]
+            self._sums[c] += np.bincount(codes, weights=np.asarray(values, dtype=np.float64),
+                                         minlength=n)
+        self._periods += np.bincount(codes, minlength=n)
+
+    def _grow(self, n):
+        old = len(self._periods)
+        if n > old:
+            self._periods = np.concatenate([self._periods, np.zeros(n - old, dtype=np.int64)])
+            for c in YTD_COLUMNS:
+                self._sums[c] = np.concatenate([self._sums[c], np.zeros(n - old)])
+
+    def totals(self) -> pd.DataFrame:
+        """
+        One row per employee: periods, summed hours, totals and premiums,
+        qoc_gross, the number of mismatched periods per multiplier
+        (mismatch_periods_1_5/_2_0) and of periods with errors.
+        """
+        s = self._sums
+        out = pd.DataFrame({"employee": list(self._codes), "periods": self._periods})
+        for c in ("ot_hours_1_5", "dt_hours_2_0", "ot_1_5_total", "ot_2_0_total",
+                  "ot_1_5_premium", "ot_2_0_premium"):
+            out[c] = s[c]
+        out["qoc_gross"] = s["ot_1_5_premium"] + s["ot_2_0_premium"]
+        out["mismatch_periods_1_5"] = s["mismatch_1_5"].astype(np.int64)
+        out["mismatch_periods_2_0"] = s["mismatch_2_0"].astype(np.int64)
+        out["error_periods"] = s["error"].astype(np.int64)
+        return out
+
+
+def aggregate_ytd(periods: pd.DataFrame) -> pd.DataFrame:
+    """flag_periods + YTDAccumulator for a table that fits in memory."""
+    acc = YTDAccumulator()
+    acc.add(flag_periods(periods))
+    return acc.totals()
@@ -0,0 +1,111 @@
+"""
+Text measurement and fitting for the PDF report.
+
+fpdf2's get_string_width re-normalizes and re-shapes the string on every
+call, and the old row code called it once per dropped character. Here the
+advance widths of each font (its "cw" table, in 1/1000 em) are cached per
+font key, a string is measured in one pass, and truncation/wrapping use
+prefix sums with a binary search. Results for a given label, font and width
+are memoized, so the static localized labels are laid out once per language
+and process rather than once per report.
+
+Widths match FPDF.get_string_width for unshaped text with default stretching
+and character spacing, which is how the report is drawn.
+"""
+import functools
+import itertools
+import threading
+from bisect import bisect_right
+
+ELLIPSIS = "…"
+
+_widths = {}  # font key -> {char: advance in 1/1000 em}
+_widths_lock = threading.Lock()
+
+
+class FontMetrics:
+    """Advance widths of one font, read from its cw table on first use of each char."""
+
+    def __init__(self, font):
+        self.fontkey = font.fontkey
+        self._cw = font.cw
+        self._cache = {}
+
+    def units(self, char):
+        w = self._cache.get(char)
+        if w is None:
+            w = self._cache[char] = self._cw[ord(char)]
+        return w
+
+    def prefix_units(self, text):
+        """[0, w(text[:1]), w(text[:2]), ...] in 1/1000 em."""
+        return list(itertools.accumulate((self.units(c) for c in text), initial=0))
+
+
+def metrics_for(pdf):
+    """FontMetrics of the PDF's current font, shared by every document using it."""
+    font = pdf.current_font
+    with _widths_lock:
+        metrics = _widths.get(font.fontkey)
+        if metrics is None:
+            metrics = _widths[font.fontkey] = FontMetrics(font)
+        return metrics
+
+
+def _scale(pdf):
+    """Multiplier from 1/1000 em to user units at the current font size."""
+    return pdf.font_size_pt * 0.001 / pdf.k
+
+
+def text_width(pdf, text):
+    """Width of text in user units with the current font (one pass, cached glyphs)."""
+    metrics = metrics_for(pdf)
+    return sum(metrics.units(c) for c in text) * _scale(pdf)
+
+
+def fit_text(pdf, text, max_width, min_chars=4):
+    """
+    Return text unchanged if it fits max_width, otherwise its longest prefix
+    (at least min_chars characters) followed by an ellipsis that fits.
+    """
+    return _fit_text(metrics_for(pdf), pdf.font_size_pt / pdf.k, text, max_width, min_chars)
+
+
+@functools.lru_cache(maxsize=4096)
+def _fit_text(metrics, size, text, max_width, min_chars):
+    limit = max_width / (size * 0.001)  # max_width in 1/1000 em
+    prefix = metrics.prefix_units(text)
+    if prefix[-1] <= limit or len(text) <= min_chars + 1:
+        return text
+    # Largest n with width(text[:n] + "…") <= limit, searched on the prefix sums
+    n = bisect_right(prefix, limit - metrics.units(ELLIPSIS)) - 1
+    n = max(min_chars, min(n, len(text) - 2))
+    return text[:n] + ELLIPSIS
+
+
+def wrap_text(pdf, text, max_width):
+    """Split text into lines no wider than max_width, breaking at spaces when possible."""
+    return list(_wrap_text(metrics_for(pdf), pdf.font_size_pt / pdf.k, text, max_width))
+
+
+@functools.lru_cache(maxsize=1024)
+def _wrap_text(metrics, size, text, max_width):
+    limit = max_width / (size * 0.001)
+    lines = []
+    start = 0
+    prefix = metrics.prefix_units(text)
+    while start < len(text):
+        # Furthest end such that text[start:end] fits
+        end = bisect_right(prefix, prefix[start] + limit, lo=start + 1) - 1
+        if end >= len(text):
+            lines.append(text[start:])
+            break
+        end = max(end, start + 1)
+        space = text.rfind(" ", start, end + 1)
+        if space > start:
+            end = space
+        lines.append(text[start:end].rstrip())
+        start = end
+        while start < len(text) and text[start] == " ":
+            start += 1
+    return tuple(lines)
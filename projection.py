@@ -0,0 +1,114 @@
+"""
+Year-end deduction projection from year-to-date pay: vectorized Monte Carlo.
+
+Mid-year the deduction is not known yet: it depends on the full-year MAGI
+and overtime. Each employee's remaining pay periods are simulated from their
+own year-to-date averages, and every simulated year goes through
+calculate_ot_premium_batch and apply_phaseout_batch like a real one.
+
+Pay per period (base pay, 1.5× and 2.0× overtime) is modelled as a gamma
+variable with the year-to-date mean per period and a coefficient of
+variation (ProjectionModel). The sum of r independent Gamma(a, θ) periods is
+exactly Gamma(r·a, θ), so one draw per variable gives the whole rest of the
+year: the cost is draws × employees regardless of periods left. Employees
+are processed in blocks of about BLOCK_CELLS draws so memory stays flat.
+
+Results are reproducible: the same seed, inputs and block layout give the
+same draws.
+
+Input columns: ytd_income (year-to-date income, overtime included; MAGI so
+far), ot_1_5_total, ot_2_0_total (overtime paid so far), periods (pay periods
+elapsed), optionally periods_per_year, filing_status and tax_year. The
+ot_*_total / periods columns are the output of the paystubs command:
+
+    python batch.py project ytd.csv projected.csv --draws 10000 --seed 7
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from logic import apply_phaseout_batch, calculate_ot_premium_batch, phaseout_limits_batch
+
+DEFAULT_DRAWS = 10_000
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+BLOCK_CELLS = 1 << 21  # draws × employees evaluated at once
+
+
+class ProjectionModel(NamedTuple):
+    """Coefficient of variation of each pay component per period."""
+    income_cv: float = 0.10  # base (non-overtime) pay
+    ot_cv: float = 0.60      # overtime pay, 1.5× and 2.0×
+
+
+def _remaining(rng, draws, per_period, periods_left, cv):
+    """
+    (employees, draws) rest-of-year totals: Gamma(periods_left / cv², per_period · cv²).
+    Employees are rows so every per-employee reduction runs over contiguous memory.
+    """
+    size = (per_period.size, draws)
+    if cv <= 0:
+        return np.broadcast_to((per_period * periods_left)[:, None], size)
+    # Only employees with pay of this kind (and periods left) need draws
+    active = np.flatnonzero((per_period > 0) & (periods_left > 0))
+    out = np.zeros(size)
+    out[active] = rng.gamma((periods_left[active] / cv**2)[:, None],
+                            (per_period[active] * cv**2)[:, None], size=(active.size, draws))
+    return out
+
+
+def project_deduction(ytd_income, ytd_ot_1_5, ytd_ot_2_0, periods_elapsed, periods_per_year,
+                      filing_status, tax_year=None, draws=DEFAULT_DRAWS, seed=None,
+                      percentiles=DEFAULT_PERCENTILES, model=ProjectionModel()) -> dict:
+    """
+    Monte Carlo distribution of each employee's year-end total_deduction.
+
+    All inputs are per-employee arrays (or scalars); periods_elapsed must be
+    > 0 where there is anything to extrapolate. Returns a dict of arrays:
+
+    - deduction_p{q} for every q in percentiles, and deduction_mean;
+    - magi_p50, qoc_gross_p50: the medians of the simulated full year;
+    - cap_binds_share: share of draws in which the phase-out limit, not the
+      premium, sets the deduction.
+    """
+    ytd_income, ytd_ot_1_5, ytd_ot_2_0, elapsed, per_year = (
+        np.atleast_1d(np.asarray(v, dtype=np.float64))
+        for v in (ytd_income, ytd_ot_1_5, ytd_ot_2_0, periods_elapsed, periods_per_year))
+    n = np.broadcast_shapes(ytd_income.shape, ytd_ot_1_5.shape, ytd_ot_2_0.shape,
+                            elapsed.shape, per_year.shape)[0]
+    ytd_income, ytd_ot_1_5, ytd_ot_2_0, elapsed, per_year = (
+        np.broadcast_to(v, (n,)) for v in (ytd_income, ytd_ot_1_5, ytd_ot_2_0, elapsed, per_year))
+    max_value, phase_start, phase_range = (
+        np.broadcast_to(v, (n,)) for v in phaseout_limits_batch(filing_status, tax_year))
+
+    left = np.maximum(per_year - elapsed, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base_rate = np.where(elapsed > 0, np.maximum(ytd_income - ytd_ot_1_5 - ytd_ot_2_0, 0) / elapsed, 0)
+        ot_1_5_rate = np.where(elapsed > 0, ytd_ot_1_5 / elapsed, 0)
+        ot_2_0_rate = np.where(elapsed > 0, ytd_ot_2_0 / elapsed, 0)
+
+    rng = np.random.default_rng(seed)
+    out = {f"deduction_p{q:g}": np.empty(n) for q in percentiles}
+    out.update({k: np.empty(n) for k in ("deduction_mean", "magi_p50", "qoc_gross_p50",
+                                         "cap_binds_share")})
+    block = max(1, BLOCK_CELLS // draws)
+    for lo in range(0, n, block):
+        s = slice(lo, min(lo + block, n))
+        more_1_5 = _remaining(rng, draws, ot_1_5_rate[s], left[s], model.ot_cv)
+        more_2_0 = _remaining(rng, draws, ot_2_0_rate[s], left[s], model.ot_cv)
+        more_base = _remaining(rng, draws, base_rate[s], left[s], model.income_cv)
+        ot_1_5 = ytd_ot_1_5[s, None] + more_1_5
+        ot_2_0 = ytd_ot_2_0[s, None] + more_2_0
+        magi = ytd_income[s, None] + more_base + more_1_5 + more_2_0
+
+        qoc = calculate_ot_premium_batch(ot_1_5, 1.5) + calculate_ot_premium_batch(ot_2_0, 2.0)
+        limit = apply_phaseout_batch(magi, max_value[s, None], phase_start[s, None],
+                                     phase_range[s, None])
+        deduction = np.minimum(qoc, limit)
+
+        for q, values in zip(percentiles, np.percentile(deduction, percentiles, axis=1)):
+            out[f"deduction_p{q:g}"][s] = values
+        out["deduction_mean"][s] = deduction.mean(axis=1)
+        out["magi_p50"][s] = np.median(magi, axis=1)
+        out["qoc_gross_p50"][s] = np.median(qoc, axis=1)
+        out["cap_binds_share"][s] = (limit < qoc).mean(axis=1)
+    return out
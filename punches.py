@@ -0,0 +1,302 @@
+"""
+Time-clock punch ingestion: raw punches → FLSA workweek overtime hours.
+
+Reads punch exports (employee, clock-in, clock-out) in chunks, splits every
+punch at workday boundaries, and keeps only running per-employee, per-day
+hour totals (two flat arrays keyed by employee code and day), so memory
+grows with employee-days rather than punches and the punches may come in any
+order. Workweeks are fixed 7-day periods starting on OvertimeRules.week_start;
+within each week the daily rules (if any) are applied first and hours beyond
+weekly_ot_after that were not already paid as daily overtime become 1.5×
+hours (no pyramiding).
+
+CSV files are streamed with pyarrow when it is installed (several times
+faster than pandas at parsing timestamps) and with pandas otherwise; Parquet
+requires pyarrow.
+
+The per-employee totals are the ot_hours_1_5 / dt_hours_2_0 inputs of
+Option B (see apply_to_payroll):
+
+    python batch.py punches punches.csv hours.csv --payroll payroll.csv
+"""
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PUNCH_CHUNK_SIZE = 250_000
+
+_NS_PER_HOUR = 3_600 * 10**9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday (Monday = 0)
+
+# (employee code, day) pairs are packed into one int64 key: code << 24 | day + 2**23
+_DAY_BITS = 24
+_DAY_BIAS = 1 << (_DAY_BITS - 1)
+
+# Column aliases accepted in punch files → names used here
+PUNCH_COLUMN_ALIASES = {
+    "employee_id": "employee", "employee_name": "employee", "name": "employee",
+    "in": "clock_in", "start": "clock_in", "punch_in": "clock_in",
+    "out": "clock_out", "end": "clock_out", "punch_out": "clock_out",
+}
+PUNCH_COLUMNS = ("employee", "clock_in", "clock_out")
+
+
+class OvertimeRules(NamedTuple):
+    """
+    - weekly_ot_after: workweek hours after which time is paid at 1.5×.
+    - daily_ot_after / daily_dt_after: workday hours after which time is paid
+      at 1.5× / 2.0× (None = no daily rule; the FLSA has none).
+    - week_start: weekday the workweek starts on (Monday = 0, Sunday = 6).
+    - day_start_hour: hour of the day at which workdays (and workweeks) start.
+    - max_shift_hours: longer punches are treated as a missing clock-out and
+      skipped.
+    """
+    weekly_ot_after: float = 40.0
+    daily_ot_after: Optional[float] = None
+    daily_dt_after: Optional[float] = None
+    week_start: int = 6
+    day_start_hour: int = 0
+    max_shift_hours: float = 24.0
+
+
+FLSA = OvertimeRules()
+# Daily 8/12-hour rules (California-style), without the seventh-consecutive-day rule
+DAILY_8_12 = OvertimeRules(daily_ot_after=8.0, daily_dt_after=12.0)
+
+
+# ─────────────────────────────────────────────────────────────
+# READING
+# ─────────────────────────────────────────────────────────────
+def _canonical(name):
+    name = str(name).strip().lower()
+    return PUNCH_COLUMN_ALIASES.get(name, name)
+
+
+def _check_columns(names):
+    missing = set(PUNCH_COLUMNS) - {_canonical(n) for n in names}
+    if missing:
+        raise ValueError(f"Punch file is missing column(s): {', '.join(sorted(missing))}")
+
+
+def _to_ns(values):
+    """Timestamps (pyarrow or pandas column) as int64 ns, with NaT for blanks and garbage."""
+    if not isinstance(values, (pd.Series, np.ndarray)):
+        import pyarrow as pa
+        try:
+            values = values.cast(pa.timestamp("ns")).to_numpy(zero_copy_only=False)
+            return values.astype("datetime64[ns]")
+        except pa.ArrowInvalid:
+            values = values.to_pandas()  # not ISO 8601: let pandas infer the format
+    return pd.to_datetime(values, errors="coerce").to_numpy("datetime64[ns]")
+
+
+def read_punches(path, chunk_size=DEFAULT_PUNCH_CHUNK_SIZE):
+    """
+    Yield (employee ids, clock-in, clock-out) array triples of at most about
+    chunk_size punches from a CSV or Parquet file; times are datetime64[ns]
+    with NaT where a time is missing or unreadable.
+    """
+    is_parquet = os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        if is_parquet:
+            raise
+        pa = None
+
+    if pa is None:
+        for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str):
+            _check_columns(chunk.columns)
+            chunk = chunk.rename(columns=_canonical)
+            yield (chunk["employee"].fillna("").to_numpy(dtype=object),
+                   _to_ns(chunk["clock_in"]), _to_ns(chunk["clock_out"]))
+        return
+
+    if is_parquet:
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    else:
+        # Every column as text: ids keep leading zeros and times are parsed below
+        batches = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=max(1 << 20, chunk_size * 40)),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in _header(path)},
+                strings_can_be_null=True),
+        )
+    for batch in batches:
+        _check_columns(batch.schema.names)
+        cols = dict(zip(map(_canonical, batch.schema.names), batch.columns))
+        employee = cols["employee"].cast(pa.string()).to_pandas().fillna("")
+        yield (employee.to_numpy(dtype=object),
+               _to_ns(cols["clock_in"]), _to_ns(cols["clock_out"]))
+
+
+def _header(path):
+    return pd.read_csv(path, nrows=0).columns
+
+
+# ─────────────────────────────────────────────────────────────
+# AGGREGATION
+# ─────────────────────────────────────────────────────────────
+def _sum_by_key(keys, values):
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    return uniq, np.bincount(inverse, weights=values, minlength=len(uniq))
+
+
+class PunchAggregator:
+    """
+    Running per-employee, per-workday hour totals.
+
+    add() takes chunks of punches in any order; weekly() classifies the
+    totals so far into regular / 1.5× / 2.0× hours per workweek.
+    """
+
+    def __init__(self, rules: OvertimeRules = FLSA):
+        self.rules = rules
+        self.punches = 0
+        self.skipped = 0
+        self._codes = {}                          # employee id -> dense code
+        self._keys = np.empty(0, dtype=np.int64)  # sorted (code, day) keys
+        self._hours = np.empty(0)
+
+    def _encode(self, employee):
+        inverse, uniques = pd.factorize(employee)
+        codes = np.fromiter((self._codes.setdefault(e, len(self._codes)) for e in uniques),
+                            dtype=np.int64, count=len(uniques))
+        return codes[inverse]
+
+    def add(self, employee, clock_in, clock_out):
+        """Add one chunk of punches (arrays as yielded by read_punches)."""
+        shift = self.rules.day_start_hour * _NS_PER_HOUR
+        valid = ~(np.isnat(clock_in) | np.isnat(clock_out))
+        start = clock_in.view(np.int64) - shift
+        end = clock_out.view(np.int64) - shift
+        length = end - start
+        valid &= (length > 0) & (length <= self.rules.max_shift_hours * _NS_PER_HOUR)
+        self.punches += len(valid)
+        self.skipped += int((~valid).sum())
+
+        code = self._encode(employee[valid])
+        start, end = start[valid], end[valid]
+
+        # One segment per workday a punch touches (end is exclusive)
+        first_day = start // _NS_PER_DAY
+        spans = (end - 1) // _NS_PER_DAY - first_day + 1
+        idx = np.repeat(np.arange(len(start)), spans)
+        offset = np.arange(len(idx)) - np.repeat(np.cumsum(spans) - spans, spans)
+        day = first_day[idx] + offset
+        hours = (np.minimum(end[idx], (day + 1) * _NS_PER_DAY)
+                 - np.maximum(start[idx], day * _NS_PER_DAY)) / _NS_PER_HOUR
+
+        keys, hours = _sum_by_key((code[idx] << _DAY_BITS) | (day + _DAY_BIAS), hours)
+        self._keys, self._hours = _sum_by_key(np.concatenate([self._keys, keys]),
+                                              np.concatenate([self._hours, hours]))
+
+    @property
+    def employee_days(self):
+        return len(self._keys)
+
+    def weekly(self) -> pd.DataFrame:
+        """
+        One row per (employee, week_start) with columns regular_hours,
+        ot_hours_1_5 and dt_hours_2_0; week_start is the workweek's first date.
+        """
+        rules = self.rules
+        hours = self._hours
+        code = self._keys >> _DAY_BITS
+        day = (self._keys & ((1 << _DAY_BITS) - 1)) - _DAY_BIAS
+
+        dt = np.zeros_like(hours)
+        ot = np.zeros_like(hours)
+        capped = hours
+        if rules.daily_dt_after is not None:
+            dt = np.maximum(hours - rules.daily_dt_after, 0.0)
+            capped = np.minimum(hours, rules.daily_dt_after)
+        if rules.daily_ot_after is not None:
+            ot = np.maximum(capped - rules.daily_ot_after, 0.0)
+
+        # Keys are sorted by (code, day), so each employee's weeks are contiguous
+        week = (day - (rules.week_start - _EPOCH_WEEKDAY)) // 7
+        week_keys, inverse = np.unique((code << _DAY_BITS) | (week + _DAY_BIAS),
+                                       return_inverse=True)
+        n = len(week_keys)
+        regular = np.bincount(inverse, weights=hours - ot - dt, minlength=n)
+        ot = np.bincount(inverse, weights=ot, minlength=n)
+        dt = np.bincount(inverse, weights=dt, minlength=n)
+
+        # Weekly overtime counts only hours not already paid as daily overtime
+        extra = np.maximum(regular - rules.weekly_ot_after, 0.0)
+
+        names = np.array(list(self._codes), dtype=object)
+        week = (week_keys & ((1 << _DAY_BITS) - 1)) - _DAY_BIAS
+        first_day = week * 7 + (rules.week_start - _EPOCH_WEEKDAY)
+        return pd.DataFrame({
+            "employee":      names[week_keys >> _DAY_BITS] if n else names[:0],
+            "week_start":    first_day.astype("datetime64[D]"),
+            "regular_hours": regular - extra,
+            "ot_hours_1_5":  ot + extra,
+            "dt_hours_2_0":  dt,
+        })
+
+
+def employee_hours(weekly: pd.DataFrame) -> pd.DataFrame:
+    """Per-employee totals of PunchAggregator.weekly, plus the number of workweeks worked."""
+    totals = weekly.groupby("employee", sort=False).agg(
+        regular_hours=("regular_hours", "sum"),
+        ot_hours_1_5=("ot_hours_1_5", "sum"),
+        dt_hours_2_0=("dt_hours_2_0", "sum"),
+        weeks=("week_start", "size"),
+    )
+    return totals.reset_index()
+
+
+# ─────────────────────────────────────────────────────────────
+# FILES
+# ─────────────────────────────────────────────────────────────
+def ingest_punches(path, rules: OvertimeRules = FLSA, chunk_size=DEFAULT_PUNCH_CHUNK_SIZE,
+                   progress=None):
+    """
+    Stream a punch file through a PunchAggregator and return (weekly frame,
+    stats dict with punches, skipped, employees, employee_days and weeks).
+
+    progress, if given, is called as progress(punches_read) after each chunk.
+    """
+    agg = PunchAggregator(rules)
+    for employee, clock_in, clock_out in read_punches(path, chunk_size):
+        agg.add(employee, clock_in, clock_out)
+        if progress:
+            progress(agg.punches)
+
+    weekly = agg.weekly()
+    stats = {
+        "punches":       agg.punches,
+        "skipped":       agg.skipped,
+        "employees":     weekly["employee"].nunique(),
+        "employee_days": agg.employee_days,
+        "weeks":         len(weekly),
+    }
+    return weekly, stats
+
+
+def apply_to_payroll(payroll: pd.DataFrame, hours: pd.DataFrame, on="employee") -> pd.DataFrame:
+    """
+    Fill a payroll table's Option B hour columns from employee_hours.
+
+    Matched rows get ot_hours_1_5 / dt_hours_2_0 from the punches and method
+    "hours"; unmatched rows are left as they were.
+    """
+    merged = payroll.copy()
+    by_employee = hours.set_index(hours["employee"].astype(str))
+    keys = merged[on].astype(str)
+    matched = keys.isin(by_employee.index)
+    for col in ("ot_hours_1_5", "dt_hours_2_0"):
+        current = merged[col] if col in merged else np.nan
+        merged[col] = keys.map(by_employee[col]).where(matched, current)
+    method = merged["method"] if "method" in merged else pd.Series("", index=merged.index)
+    merged["method"] = method.where(~matched, "hours")
+    return merged
@@ -0,0 +1,445 @@
+"""
+PDF report builder.
+
+Kept out of app.py so reports can be rendered away from the Streamlit script
+thread (see report_jobs.py). Nothing here touches st.*.
+
+Uploads and the merged report live on disk in a per-report work directory:
+uploads are spooled there in chunks and merged by path, so PyPDF2 reads them
+lazily instead of copying each one into memory, and the result is written
+straight to a file the download is served from.
+
+The report pages themselves are drawn over a template cached per language
+and calculation method (ReportTemplate): the disclaimer, titles, labels and
+table backgrounds are rendered once, and each request only writes its field
+values into the template's content streams.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+from typing import NamedTuple
+
+from pdf_layout import FontMetrics, fit_text, metrics_for
+from resources import add_report_fonts
+from startup import lazy_module
+from texts import fmt_num, texts
+
+fpdf   = lazy_module("fpdf")
+PyPDF2 = lazy_module("PyPDF2")
+
+REPORTS_DIR = os.environ.get("ZAITAX_REPORTS_DIR") or os.path.join(tempfile.gettempdir(),
+                                                                   "zaitax-reports")
+SPOOL_CHUNK = 1 << 20
+
+# Work directories older than this belong to sessions that are gone
+WORKDIR_MAX_AGE_SECONDS = 6 * 3600
+# Directories the sweep leaves alone however old they are: the live report
+# store (report_store.py), whose reports can outlive WORKDIR_MAX_AGE_SECONDS
+# when ZAITAX_REPORT_TTL is longer. Stores left by earlier processes are swept.
+_kept_dirs = set()
+
+
+# ─────────────────────────────────────────────────────────────
+# WORK DIRECTORIES
+# ─────────────────────────────────────────────────────────────
+def keep_dir(path):
+    """Exclude path, a directory under REPORTS_DIR, from new_workdir's sweep."""
+    _kept_dirs.add(os.path.realpath(path))
+
+
+def new_workdir():
+    """Create a private directory for one report, sweeping abandoned ones first."""
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    cutoff = time.time() - WORKDIR_MAX_AGE_SECONDS
+    for entry in os.scandir(REPORTS_DIR):
+        try:
+            if (entry.is_dir() and entry.stat().st_mtime < cutoff
+                    and os.path.realpath(entry.path) not in _kept_dirs):
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except FileNotFoundError:
+            pass
+    return tempfile.mkdtemp(dir=REPORTS_DIR)
+
+
+def spool_upload(fileobj, path):
+    """Copy an uploaded file to path in SPOOL_CHUNK pieces and return path."""
+    fileobj.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(fileobj, f, SPOOL_CHUNK)
+    return path
+
+
+def discard_report(path):
+    """Delete the work directory holding report path (no-op if already gone)."""
+    if path:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+# ─────────────────────────────────────────────────────────────
+# LAYOUT
+# ─────────────────────────────────────────────────────────────
+UW, LW, VW, RH = 170, 120, 50, 8
+ALT = (245, 245, 245)
+
+
+def _new_pdf():
+    pdf = fpdf.FPDF(format="A4")
+    pdf.set_auto_page_break(auto=True, margin=20)
+    pdf.set_margins(20, 20, 20)
+    add_report_fonts(pdf)
+    return pdf
+
+
+def _summary(tl, results, is_b):
+    """(label, value) rows of the summary table. The labels depend only on tl and is_b."""
+    def _pv(val, *, money=True, hours=False):
+        if not val:
+            return "--"
+        if hours:
+            return f"{float(val):.0f} h"
+        return fmt_num(val) if money else str(val)
+
+    return [
+        (tl["filing_status_label"],  results["filing_status"]),
+        (tl["ss_check_label"],       results["ss_check"]),
+        (tl["itin_check_label"],     results["itin_check"]),
+        (tl["over_40_label"],        results["over_40"]),
+        (tl["ot_1_5x_label"],        results["ot_1_5x"]),
+        (tl["magi_label"],           fmt_num(results["total_income"])),
+        (tl["data_base_salary"],     fmt_num(results["base_salary"])),
+        (tl["data_method_used"],     results["method_used"]),
+        *([(tl["regular_rate_label"],  _pv(results["regular_rate"])),
+           (tl["ot_hours_1_5_label"],  _pv(results["ot_hours_1_5"], hours=True)),
+           (tl["dt_hours_2_0_label"],  _pv(results["dt_hours_2_0"], hours=True))] if is_b
+          else [(tl["ot_total_1_5_paid_label"], fmt_num(results["ot_1_5_total"])),
+                (tl["ot_total_2_0_paid_label"], fmt_num(results["ot_2_0_total"]))]),
+        *([(tl["data_concept_expected_rate_1_5"], fmt_num(results["expected_rate_1_5"])),
+           (tl["data_concept_expected_rate_2_0"], fmt_num(results["expected_rate_2_0"])),
+           (tl["actual_rate_1_5_label"],
+            fmt_num(results["actual_rate_1_5"]) if results["actual_rate_1_5"] > 0 else "--"),
+           (tl["actual_rate_2_0_label"],
+            fmt_num(results["actual_rate_2_0"]) if results["actual_rate_2_0"] > 0 else "--"),
+           (tl["data_rate_mismatch"], results["rate_mismatch_label"])] if is_b else []),
+        (tl["ot_total_1_5_paid_label"], fmt_num(results["ot_1_5_total"])),
+        (tl["ot_total_2_0_paid_label"], fmt_num(results["ot_2_0_total"])),
+        (tl["data_ot_total_paid"],       fmt_num(results["ot_total_paid"])),
+        (tl["data_premium_1_5"],         fmt_num(results["ot_1_5_premium"])),
+        (tl["data_premium_2_0"],
+         fmt_num(results["ot_2_0_premium"]) if results["ot_2_0_premium"] > 0 else "--"),
+        (tl["data_qoc_gross"],        fmt_num(results["qoc_gross"])),
+        (tl["phaseout_limit_label"],  fmt_num(results["deduction_limit"])),
+        (tl["total_deduction_label"], fmt_num(results["total_deduction"])),
+    ]
+
+
+def _fields(tl, results, user_name, num_docs, rows):
+    """Every per-request string of the report, keyed by the name _layout draws it under."""
+    fields = {
+        "date":      tl["pdf_date"].format(datetime.now().strftime("%Y-%m-%d %H:%M")),
+        "user_name": user_name,
+        "num_docs":  str(num_docs),
+        "final":     tl["pdf_final_deduction"].format(fmt_num(results["total_deduction"])),
+        "evidence":  tl["pdf_docs_attached"].format(num_docs) if num_docs else tl["pdf_no_docs"],
+    }
+    fields.update((f"row{i}", val) for i, (_, val) in enumerate(rows))
+    return fields
+
+
+def _layout(pdf, tl, labels, put):
+    """
+    Draw the report pages. Static text is drawn directly; each per-request
+    field is drawn by put(key, w, h, multi=False, **cell_kwargs) at the
+    current position, so the same layout serves full renders and templates.
+    """
+    def _sec(text):
+        pdf.ln(6)
+        pdf.set_fill_color(30, 100, 200); pdf.set_text_color(255, 255, 255)
+        pdf.set_font("DejaVu", "B", 11)
+        pdf.cell(UW, 9, text, new_x="LMARGIN", new_y="NEXT", fill=True)
+        pdf.set_text_color(0, 0, 0); pdf.set_font("DejaVu", "", 10); pdf.ln(1)
+
+    def _hdr(c1, c2):
+        x, y = pdf.l_margin, pdf.get_y()
+        pdf.set_fill_color(50, 50, 50); pdf.set_text_color(255, 255, 255)
+        pdf.set_font("DejaVu", "B", 10); pdf.set_xy(x, y)
+        pdf.cell(LW, RH, c1, fill=True, border=0)
+        pdf.cell(VW, RH, c2, fill=True, border=0, align="R",
+                 new_x="LMARGIN", new_y="NEXT")
+        pdf.set_text_color(0, 0, 0); pdf.set_font("DejaVu", "", 10)
+
+    def _row(label, idx=0):
+        if pdf.get_y() + RH > pdf.h - pdf.b_margin:
+            pdf.add_page()
+        x, y = pdf.l_margin, pdf.get_y()
+        pdf.set_fill_color(*(ALT if idx % 2 == 0 else (255, 255, 255)))
+        pdf.rect(x, y, UW, RH, style="F")
+        pdf.set_font("DejaVu", "B", 9)
+        label = fit_text(pdf, label, LW - 4)
+        pdf.set_xy(x + 2, y); pdf.cell(LW - 2, RH, label, border=0)
+        pdf.set_font("DejaVu", "", 9)
+        pdf.set_xy(x + LW, y)
+        put(f"row{idx}", VW, RH, border=0, align="R", new_x="LMARGIN", new_y="NEXT")
+
+    def _body(text):
+        pdf.set_font("DejaVu", "", 10)
+        pdf.multi_cell(UW, 6, text); pdf.ln(2)
+
+    def _info_box(pairs):
+        x, y0 = pdf.l_margin, pdf.get_y()
+        pdf.set_fill_color(240, 244, 255)
+        pdf.rect(x, y0, UW, len(pairs) * RH + 4, style="F")
+        for lbl, key in pairs:
+            pdf.set_xy(x + 2, pdf.get_y())
+            pdf.set_font("DejaVu", "B", 10); pdf.cell(90, RH, lbl, border=0)
+            pdf.set_font("DejaVu", "", 10)
+            put(key, UW - 92, RH, border=0, new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(3)
+
+    pdf.add_page()
+    pdf.set_fill_color(200, 30, 30); pdf.set_text_color(255, 255, 255)
+    pdf.set_font("DejaVu", "B", 13)
+    pdf.cell(UW, 12, tl["disclaimer_label"], new_x="LMARGIN", new_y="NEXT", fill=True)
+    pdf.set_text_color(0, 0, 0); pdf.ln(5)
+    _body(tl["disclaimer_msg"])
+
+    pdf.add_page()
+    pdf.set_fill_color(30, 100, 200); pdf.set_text_color(255, 255, 255)
+    pdf.set_font("DejaVu", "B", 14)
+    pdf.multi_cell(UW, 11, tl["pdf_title"], align="C", fill=True,
+                   new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0); pdf.ln(2)
+    pdf.set_font("DejaVu", "", 9)
+    pdf.cell(UW, 6, tl["pdf_generated_by"], align="C", new_x="LMARGIN", new_y="NEXT")
+    put("date", UW, 6, align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+    _info_box([(tl["pdf_user_name"], "user_name"),
+               (tl["pdf_used_count"], "num_docs")])
+
+    _sec(tl["pdf_summary_title"])
+    _hdr(tl["data_column_concept"], tl["data_column_value"])
+    for i, lbl in enumerate(labels):
+        _row(lbl, idx=i)
+
+    pdf.ln(6)
+    pdf.set_fill_color(0, 140, 60); pdf.set_text_color(255, 255, 255)
+    pdf.set_font("DejaVu", "B", 12)
+    put("final", UW, 12, fill=True, new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0); pdf.set_font("DejaVu", "", 10)
+
+    _sec(tl["pdf_evidence_title"])
+    pdf.set_font("DejaVu", "", 10)
+    put("evidence", UW, 6, multi=True)
+    pdf.ln(2)
+
+
+def _render(tl, labels, fields):
+    """Full fpdf render of one report; returns (pdf bytes, page count)."""
+    pdf = _new_pdf()
+
+    def put(key, w, h, multi=False, **kwargs):
+        if multi:
+            pdf.multi_cell(w, h, fields[key], **kwargs)
+        else:
+            pdf.cell(w, h, fields[key], **kwargs)
+
+    _layout(pdf, tl, labels, put)
+    return pdf.output(), pdf.pages_count
+
+
+# ─────────────────────────────────────────────────────────────
+# TEMPLATES
+# ─────────────────────────────────────────────────────────────
+# Characters the regular font of a template can overlay besides those of the
+# language's own texts: printable ASCII, Latin-1 and Latin Extended-A, which
+# covers user names in Spanish, English and most European languages.
+OVERLAY_CHARSET = "".join(map(chr, [*range(0x20, 0x7F), *range(0xA0, 0x180)])) + "–—‘’“”…€"
+OVERLAY_DIGITS  = "0123456789$,.-"
+
+
+class _Slot(NamedTuple):
+    key: str
+    page: int        # 0-based
+    x: float
+    y: float
+    w: float
+    h: float
+    align: str
+    multi: bool
+    font: int        # /F<n> resource number
+    size_pt: float
+    color: str       # fill operator, e.g. "0 g"
+    metrics: FontMetrics
+
+
+class ReportTemplate:
+    """
+    The static pages of a report for one language and method: everything
+    but the per-request fields, rendered and subset once. render() draws the
+    fields straight into the page content streams with the template's own
+    font subsets, so a report costs a PDF parse and write rather than a
+    full fpdf render (whose font subsetting alone is about two thirds of it).
+    """
+
+    def __init__(self, tl, labels):
+        pdf = _new_pdf()
+        slots = []
+        styles = {}  # /F<n> -> font style of the fields drawn with it
+
+        def put(key, w, h, multi=False, **kwargs):
+            styles[pdf.current_font.i] = pdf.font_style
+            slots.append(_Slot(key, pdf.page - 1, pdf.get_x(), pdf.get_y(), w, h,
+                               kwargs.get("align", "L"), multi, pdf.current_font.i,
+                               pdf.font_size_pt, pdf.text_color.serialize().lower(),
+                               metrics_for(pdf)))
+            kwargs.pop("align", None)
+            pdf.cell(w, h, "", **kwargs)
+
+        _layout(pdf, tl, labels, put)
+
+        # Subset codes of every overlayable character, picked before output so
+        # their glyphs are embedded in the template's font subsets
+        text_chars = set("".join(v for v in tl.values() if isinstance(v, str)))
+        charsets = {
+            "R": set(OVERLAY_CHARSET) | text_chars,
+            "B": set(tl["pdf_final_deduction"]) | set(OVERLAY_DIGITS),
+        }
+        self.codes = {}
+        for font in pdf.fonts.values():
+            if font.i in styles:
+                codes = {}
+                for c in charsets["B" if "B" in styles[font.i] else "R"]:
+                    if ord(c) in font.cmap:
+                        codes[c] = chr(font.subset.pick(ord(c)))
+                self.codes[font.i] = codes
+
+        self.slots = slots
+        self.k = pdf.k
+        self.page_h = pdf.h
+        self.c_margin = pdf.c_margin
+        self.pages = pdf.pages_count
+        self.data = bytes(pdf.output())
+
+    def _text_op(self, slot, text):
+        codes = self.codes[slot.font]
+        if any(c not in codes for c in text):
+            return None
+        width = sum(slot.metrics.units(c) for c in text) * slot.size_pt * 0.001 / self.k
+        if slot.multi and width > slot.w - 2 * self.c_margin:
+            return None  # would wrap; only single-line bodies are overlaid
+        if slot.align == "R":
+            dx = slot.w - self.c_margin - width
+        elif slot.align == "C":
+            dx = (slot.w - width) / 2
+        else:
+            dx = self.c_margin
+        x = (slot.x + dx) * self.k
+        y = (self.page_h - slot.y - 0.5 * slot.h - 0.3 * slot.size_pt / self.k) * self.k
+        mapped = "".join(codes[c] for c in text)
+        encoded = fpdf.util.escape_parens(mapped.encode("utf-16-be").decode("latin-1"))
+        return (f"BT /F{slot.font} {slot.size_pt:.2f} Tf {x:.2f} {y:.2f} Td "
+                f"{slot.color} ({encoded}) Tj ET")
+
+    def render(self, fields):
+        """
+        Report bytes with fields drawn in, or None if one of them cannot be
+        overlaid (a character outside the subsets, or a body that would wrap).
+        """
+        ops = {}
+        for slot in self.slots:
+            text = fields[slot.key]
+            if not text:
+                continue
+            op = self._text_op(slot, text)
+            if op is None:
+                return None
+            ops.setdefault(slot.page, []).append(op)
+
+        reader = PyPDF2.PdfReader(BytesIO(self.data))
+        # Pages only list the fonts they use, and a page may hold nothing but
+        # overlaid text in the regular font
+        fonts = {}
+        for page in reader.pages:
+            fonts.update(page["/Resources"].get_object().get("/Font", {}))
+        writer = PyPDF2.PdfWriter()
+        for i, page in enumerate(reader.pages):
+            if i in ops:
+                resources = page["/Resources"].get_object()
+                page_fonts = resources.setdefault(PyPDF2.generic.NameObject("/Font"),
+                                                  PyPDF2.generic.DictionaryObject())
+                page_fonts.get_object().update(fonts)
+            page = writer.add_page(page)
+            if i in ops:
+                content = page["/Contents"].get_object().get_data()
+                stream = PyPDF2.generic.DecodedStreamObject()
+                stream.set_data(content + ("\nq " + " ".join(ops[i]) + " Q").encode("latin-1"))
+                page[PyPDF2.generic.NameObject("/Contents")] = writer._add_object(
+                    stream.flate_encode())
+        out = BytesIO()
+        writer.write(out)
+        return out.getvalue()
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_template(lang, is_b, labels):
+    """Process-wide ReportTemplate for a language and calculation method."""
+    with _templates_lock:
+        template = _templates.get((lang, is_b))
+        if template is None:
+            template = _templates[(lang, is_b)] = ReportTemplate(texts[lang], labels)
+        return template
+
+
+# ─────────────────────────────────────────────────────────────
+# BUILDER
+# ─────────────────────────────────────────────────────────────
+def build_pdf(user_name, attachments, results, lang, progress=None, out_path=None):
+    """
+    Render the deduction report and append the attached PDFs.
+
+    - attachments: uploaded PDFs as file paths (read lazily) or bytes.
+    - progress: optional callable, called as progress(pages=..., merged=...,
+      total=...) once the report pages are rendered and after each attachment
+      is merged.
+    - out_path: write the merged PDF to this file and return the path;
+      without it the PDF is returned as bytes.
+
+    The report is drawn over the cached template for its language and method,
+    falling back to a full render when a field cannot be overlaid.
+    """
+    tl = texts[lang]
+    num_docs = len(attachments)
+    is_b = results["method_used"] == tl["method_hours"]
+    rows = _summary(tl, results, is_b)
+    labels = [lbl for lbl, _ in rows]
+    fields = _fields(tl, results, user_name, num_docs, rows)
+
+    template = get_template(lang, is_b, labels)
+    report, pages = template.render(fields), template.pages
+    if report is None:
+        report, pages = _render(tl, labels, fields)
+    if progress:
+        progress(pages=pages, merged=0, total=num_docs)
+
+    merger = PyPDF2.PdfMerger()
+    try:
+        merger.append(BytesIO(report))
+        for i, src in enumerate(attachments, start=1):
+            # PyPDF2 copies file objects into memory but opens paths and reads them lazily
+            merger.append(BytesIO(src) if isinstance(src, bytes) else src)
+            if progress:
+                progress(merged=i)
+        if out_path is None:
+            out = BytesIO()
+            merger.write(out)
+            return out.getvalue()
+        merger.write(out_path)
+        return out_path
+    finally:
+        merger.close()
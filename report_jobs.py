@@ -0,0 +1,169 @@
+"""
+Background report generation with bounded concurrency.
+
+Building a report (rendering plus merging every uploaded PDF) used to run
+inside the button click, blocking that session's script thread while every
+other session did the same. Jobs are now submitted to one process-wide pool:
+at most max_workers reports render at once, at most max_queued wait behind
+them, and anything beyond that is rejected with QueueFull so a burst of
+requests queues up instead of stalling the server.
+
+The UI submits a job, keeps only its id in session_state and polls it
+(job.status, job.progress) from a fragment that reruns on a timer.
+
+Configure with ZAITAX_REPORT_WORKERS (default 2) and ZAITAX_REPORT_QUEUE
+(default 16).
+"""
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE   = 16
+
+# Finished jobs nobody collected (closed tab, expired session) are dropped after this
+JOB_TTL_SECONDS = 600
+
+
+class QueueFull(Exception):
+    """Too many reports are already running or waiting."""
+
+
+class ReportJob:
+    """
+    One report request. Fields are written by the worker thread and only
+    read by the UI.
+
+    - status: "queued", "running", "done" or "failed".
+    - progress: {"pages": rendered report pages, "merged": attachments
+      merged so far, "total": attachments to merge}.
+    - result: the PDF bytes once done; error: the message once failed.
+    """
+
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+    def __init__(self, job_id, total):
+        self.id = job_id
+        self.status = self.QUEUED
+        self.progress = {"pages": 0, "merged": 0, "total": total}
+        self.result = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def update(self, **fields):
+        self.progress = {**self.progress, **fields}
+
+
+class ReportQueue:
+    """
+    - max_workers: reports rendered concurrently.
+    - max_queued: reports allowed to wait for a free worker.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_queued=DEFAULT_QUEUE):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="report")
+        self._jobs = {}
+        # Futures submitted and not yet done, including jobs popped while running
+        self._pending = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, total=0, **kwargs):
+        """
+        Queue fn(*args, progress=job.update, **kwargs) and return its ReportJob.
+        total is the number of attachments, for progress display.
+        Raises QueueFull when max_workers + max_queued jobs are pending.
+        """
+        with self._lock:
+            self._prune()
+            if self._pending >= self.max_workers + self.max_queued:
+                raise QueueFull(f"{self._pending} reports pending")
+            job = ReportJob(f"r{next(self._ids)}", total)
+            self._jobs[job.id] = job
+            self._pending += 1
+
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        job.future.add_done_callback(self._done)
+        return job
+
+    def _done(self, future):
+        # Also called for futures cancelled by pop
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = ReportJob.RUNNING
+        try:
+            job.result = fn(*args, progress=job.update, **kwargs)
+            job.status = ReportJob.DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = ReportJob.FAILED
+        finally:
+            job.finished_at = time.monotonic()
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.finished and now - j.finished_at > JOB_TTL_SECONDS]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pop(self, job_id):
+        """
+        Forget job_id (after its result was collected, or when abandoned).
+        A job still waiting for a worker is cancelled; one already running
+        keeps counting against the queue until it finishes.
+        """
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None and job.future is not None:
+            job.future.cancel()
+        return job
+
+    def ahead_of(self, job_id):
+        """Number of queued jobs submitted before job_id."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != ReportJob.QUEUED:
+                return 0
+            return sum(j.status == ReportJob.QUEUED and j.submitted_at < job.submitted_at
+                       for j in self._jobs.values())
+
+    def stats(self):
+        with self._lock:
+            counts = {ReportJob.QUEUED: 0, ReportJob.RUNNING: 0,
+                      ReportJob.DONE: 0, ReportJob.FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Process-wide ReportQueue shared by every session."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ReportQueue(
+                max_workers=int(os.environ.get("ZAITAX_REPORT_WORKERS", DEFAULT_WORKERS)),
+                max_queued=int(os.environ.get("ZAITAX_REPORT_QUEUE", DEFAULT_QUEUE)),
+            )
+        return _queue
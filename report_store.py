@@ -0,0 +1,204 @@
+"""
+Process-wide store for generated reports.
+
+Sessions keep only a handle (report id) instead of the PDF itself, so idle
+tabs no longer pin megabytes each. Every live report has a file in the disk
+tier; recently downloaded ones are also kept in a small in-memory tier. Both
+tiers are bounded in bytes with LRU eviction, and entries expire TTL seconds
+after they were stored. An evicted or expired handle simply reads as missing
+and the UI offers to generate the report again.
+
+Configure with ZAITAX_REPORT_MEMORY_MB (default 64), ZAITAX_REPORT_DISK_MB
+(default 2048) and ZAITAX_REPORT_TTL seconds (default 3600).
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple
+
+from report import REPORTS_DIR, keep_dir
+
+logger = logging.getLogger("zaitax.report_store")
+
+DEFAULT_MEMORY_BYTES = 64 << 20
+DEFAULT_DISK_BYTES   = 2048 << 20
+DEFAULT_TTL_SECONDS  = 3600
+
+STORE_DIR_PREFIX = "store-"
+
+
+class _Entry(NamedTuple):
+    path: str
+    size: int
+    expires_at: float
+
+
+class ReportStore:
+    """
+    - directory: where the disk tier keeps its files.
+    - memory_bytes: budget for the in-memory tier. A report larger than a
+      quarter of it is only ever served from disk.
+    - disk_bytes: budget for the disk tier; least recently used reports are
+      deleted beyond it.
+    - ttl: seconds a report stays available after it was stored.
+    """
+
+    def __init__(self, directory, memory_bytes=DEFAULT_MEMORY_BYTES,
+                 disk_bytes=DEFAULT_DISK_BYTES, ttl=DEFAULT_TTL_SECONDS, clock=time.monotonic):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # handle -> _Entry, LRU order
+        self._memory = OrderedDict()   # handle -> bytes, LRU order
+        self._disk_used = 0
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ── writes ────────────────────────────────────────────────
+    def put(self, data: bytes) -> str:
+        """Store report bytes and return their handle."""
+        handle = uuid.uuid4().hex
+        path = self._path(handle)
+        with open(path, "wb") as f:
+            f.write(data)
+        return self._add(handle, path, len(data))
+
+    def adopt(self, src_path) -> str:
+        """Move an existing report file into the store and return its handle."""
+        handle = uuid.uuid4().hex
+        path = self._path(handle)
+        os.replace(src_path, path)
+        return self._add(handle, path, os.path.getsize(path))
+
+    def _path(self, handle):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{handle}.pdf")
+
+    def _add(self, handle, path, size):
+        with self._lock:
+            self._entries[handle] = _Entry(path, size, self._clock() + self.ttl)
+            self._disk_used += size
+            self._expire()
+            while self._disk_used > self.disk_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        logger.debug("stored report %s (%d bytes); %s", handle, size, self.stats())
+        return handle
+
+    # ── reads ─────────────────────────────────────────────────
+    def get(self, handle):
+        """Return the report bytes for handle, or None if it expired or was evicted."""
+        with self._lock:
+            entry = self._live_entry(handle)
+            if entry is None:
+                self.misses += 1
+                return None
+            data = self._memory.get(handle)
+            if data is not None:
+                self._memory.move_to_end(handle)
+                self.memory_hits += 1
+                return data
+
+        try:
+            with open(entry.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.discard(handle)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            # Another reader may have cached it while this one was on disk
+            if (handle in self._entries and handle not in self._memory
+                    and entry.size <= self.memory_bytes // 4):
+                self._memory[handle] = data
+                self._memory_used += entry.size
+                while self._memory_used > self.memory_bytes:
+                    _, evicted = self._memory.popitem(last=False)
+                    self._memory_used -= len(evicted)
+        return data
+
+    def __contains__(self, handle):
+        with self._lock:
+            return self._live_entry(handle) is not None
+
+    def _live_entry(self, handle):
+        entry = self._entries.get(handle)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            self._drop(handle)
+            return None
+        self._entries.move_to_end(handle)
+        return entry
+
+    # ── removal ───────────────────────────────────────────────
+    def discard(self, handle):
+        with self._lock:
+            self._drop(handle)
+
+    def _drop(self, handle):
+        entry = self._entries.pop(handle, None)
+        if entry is None:
+            return
+        self._disk_used -= entry.size
+        data = self._memory.pop(handle, None)
+        if data is not None:
+            self._memory_used -= len(data)
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+    def _expire(self):
+        now = self._clock()
+        for handle in [h for h, e in self._entries.items() if e.expires_at <= now]:
+            self._drop(handle)
+
+    # ── metrics ───────────────────────────────────────────────
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "reports":       len(self._entries),
+            "memory_bytes":  self._memory_used,
+            "disk_bytes":    self._disk_used,
+            "memory_hits":   self.memory_hits,
+            "disk_hits":     self.disk_hits,
+            "misses":        self.misses,
+            "hit_rate":      hits / lookups if lookups else 0.0,
+            "evictions":     self.evictions,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide ReportStore, in its own directory under REPORTS_DIR (kept by the sweep)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            os.makedirs(REPORTS_DIR, exist_ok=True)
+            directory = tempfile.mkdtemp(prefix=STORE_DIR_PREFIX, dir=REPORTS_DIR)
+            keep_dir(directory)
+            _store = ReportStore(
+                directory,
+                memory_bytes=int(os.environ.get("ZAITAX_REPORT_MEMORY_MB", DEFAULT_MEMORY_BYTES >> 20)) << 20,
+                disk_bytes=int(os.environ.get("ZAITAX_REPORT_DISK_MB", DEFAULT_DISK_BYTES >> 20)) << 20,
+                ttl=float(os.environ.get("ZAITAX_REPORT_TTL", DEFAULT_TTL_SECONDS)),
+            )
+        return _store
@@ -0,0 +1,118 @@
+"""
+Static resources loaded once per process and reused by every rerun and report.
+
+app.py is re-executed on each interaction, so anything expensive it builds at
+module level (the base64 logo, the CSS block, parsed report fonts) lives here
+instead, where module state survives reruns.
+"""
+import base64
+import copy
+import functools
+import io
+import os
+import threading
+
+BASE_DIR  = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(BASE_DIR, "assets", "zaitax_logo.png")
+FONT_REG  = os.path.join(BASE_DIR, "fonts", "DejaVuSans.ttf")
+FONT_BOLD = os.path.join(BASE_DIR, "fonts", "DejaVuSans-Bold.ttf")
+
+# Family/style pairs registered on every report, in registration order
+REPORT_FONTS = (("DejaVu", "", FONT_REG), ("DejaVu", "B", FONT_BOLD))
+
+GLOBAL_CSS = """<style>
+div[data-testid="stButton"] > button {
+    background-color:#2ecc71!important;color:white!important;border:none!important;
+    border-radius:8px!important;font-weight:600!important;padding:0.5rem 1rem!important;
+    transition:all 0.2s ease!important;
+}
+div[data-testid="stButton"] > button:hover  { background-color:#27ae60!important;transform:translateY(-1px); }
+div[data-testid="stButton"] > button:active { background-color:#219150!important; }
+div[data-testid="stButton"] > button:disabled {
+    background-color:#95a5a6!important;opacity:0.7!important;cursor:not-allowed!important;
+}
+.plan-card-text        { color:var(--text-color)!important; }
+.plan-card-sub         { color:var(--secondary-text-color)!important; }
+.plan-card-li          { color:var(--text-color)!important;opacity:0.85; }
+.plan-card-name-single { color:#4da6ff!important; }
+.plan-card-name-sub    { color:#a78bfa!important; }
+.landing-title         { color:var(--text-color)!important; }
+.landing-subtitle      { color:var(--secondary-text-color)!important; }
+.plan-cards-row        { display:flex;align-items:stretch;gap:24px; }
+.plan-card             { flex:1;display:flex;flex-direction:column;justify-content:space-between; }
+.banner-green {
+    border:1px solid #28a745;border-radius:8px;padding:10px 18px;margin-bottom:16px;
+    font-size:14px;font-weight:500;
+    background:color-mix(in srgb,#28a745 15%,var(--background-color));color:var(--text-color);
+}
+.banner-yellow {
+    border:1px solid #ffc107;border-radius:8px;padding:10px 18px;margin-bottom:16px;
+    font-size:14px;font-weight:500;
+    background:color-mix(in srgb,#ffc107 15%,var(--background-color));color:var(--text-color);
+}
+/* Navigation bar styles */
+.nav-bar {
+    display:flex;gap:8px;padding:10px 0;margin-bottom:16px;
+    border-bottom:2px solid var(--secondary-background-color);
+}
+</style>
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def logo_b64() -> str:
+    with open(LOGO_PATH, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+@functools.lru_cache(maxsize=None)
+def logo_html() -> str:
+    return f"""
+<div style='text-align:center;margin-bottom:24px;'>
+  <img src="data:image/png;base64,{logo_b64()}"
+       style="max-width:420px;width:80%;height:auto;" />
+  <p style="color:var(--secondary-text-color);font-size:15px;">OVERTIME DEDUCTION CALCULATOR</p>
+</div>
+"""
+
+
+# ─────────────────────────────────────────────────────────────
+# REPORT FONTS
+# ─────────────────────────────────────────────────────────────
+_fonts_lock = threading.Lock()
+_font_protos = None
+
+
+def _report_font_prototypes():
+    """Parse the TTF files once: metrics, cmap and glyph tables, plus the raw bytes."""
+    global _font_protos
+    with _fonts_lock:
+        if _font_protos is None:
+            from fpdf import FPDF
+            proto = FPDF()
+            for family, style, path in REPORT_FONTS:
+                proto.add_font(family, style, path)
+            _font_protos = []
+            for key, font in proto.fonts.items():
+                with open(font.ttffile, "rb") as f:
+                    _font_protos.append((key, font, f.read()))
+        return _font_protos
+
+
+def add_report_fonts(pdf):
+    """
+    Register the report fonts on a new FPDF document without re-parsing the TTFs.
+
+    fpdf2's TTFFont deep copy shares the parsed tables and copies the
+    per-document state (subset, widths). The fontTools object itself is
+    subset in place when the PDF is written, so each document gets its own
+    lazily-loaded copy built from the cached file bytes.
+    """
+    from fontTools import ttLib
+
+    if pdf.fonts:
+        raise ValueError("add_report_fonts must be called before any other font is added")
+    for key, font, raw in _report_font_prototypes():
+        clone = copy.deepcopy(font)
+        clone.ttfont = ttLib.TTFont(io.BytesIO(raw), recalcTimestamp=False, lazy=True)
+        pdf.fonts[key] = clone
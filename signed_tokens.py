@@ -0,0 +1,69 @@
+"""
+Offline verification of signed access tokens.
+
+A signed token is "v1.<payload>.<signature>", where payload is the
+base64url-encoded JSON the worker would return from /validate-token
+(at least "type" and "expires_at" in epoch milliseconds) and signature is
+the base64url HMAC-SHA256 of "v1.<payload>" under a secret shared with the
+worker. Verifying one takes microseconds and needs no network; only the
+stateful consume step still calls the worker. Tokens in any other format are
+left to the worker's /validate-token endpoint.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+TOKEN_PREFIX = "v1."
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _signature(signed_part: str, key: bytes) -> bytes:
+    return hmac.new(key, signed_part.encode(), hashlib.sha256).digest()
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(TOKEN_PREFIX) and token.count(".") == 2
+
+
+def sign_token(payload: dict, key: bytes) -> str:
+    """Issue a signed token (mirror of what the worker does; used by tools and tests)."""
+    signed_part = TOKEN_PREFIX + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    return f"{signed_part}.{_b64encode(_signature(signed_part, key))}"
+
+
+def verify_signed_token(token: str, keys, now_ms=None):
+    """
+    Verify token against any of keys (several keys allow rotation).
+
+    Returns a validation payload shaped like the worker's response:
+    {"valid": True, ...payload} when the signature matches and it has not
+    expired, {"valid": False, "reason": "expired", ...} once expired, and
+    {"valid": False, "reason": "invalid"} for a bad signature or payload.
+    """
+    signed_part, _, sig = token.rpartition(".")
+    try:
+        given = _b64decode(sig)
+    except ValueError:
+        return {"valid": False, "reason": "invalid"}
+    if not any(hmac.compare_digest(given, _signature(signed_part, k)) for k in keys):
+        return {"valid": False, "reason": "invalid"}
+
+    try:
+        payload = json.loads(_b64decode(signed_part[len(TOKEN_PREFIX):]))
+        expires_at = int(payload["expires_at"])
+    except (ValueError, KeyError, TypeError):
+        return {"valid": False, "reason": "invalid"}
+
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    if expires_at <= now_ms:
+        return {**payload, "valid": False, "reason": "expired"}
+    return {**payload, "valid": True}
@@ -0,0 +1,147 @@
+"""
+Lazy loading of heavy modules and startup-time profiling.
+
+Heavy dependencies (pandas, numpy, fpdf, PyPDF2, requests) are wrapped with
+lazy_module() so they are imported on first attribute access instead of at
+app start; every import done that way is timed.
+
+Set ZAITAX_PROFILE_STARTUP=1 to log, for each script run, the time spent in
+each lazily imported module and the time to first render. Run
+
+    python startup.py
+
+to measure a cold import of the app's modules in a fresh interpreter and
+exit non-zero when it exceeds ZAITAX_STARTUP_BUDGET_MS.
+"""
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PROFILE_ENABLED   = os.environ.get("ZAITAX_PROFILE_STARTUP") == "1"
+STARTUP_BUDGET_MS = float(os.environ.get("ZAITAX_STARTUP_BUDGET_MS", "1500"))
+
+# Modules app.py needs before its first render
+APP_MODULES = ("streamlit", "logic", "worker_client", "resources", "signed_tokens", "cache",
+               "texts", "report", "report_jobs", "report_store", "memo")
+
+logger = logging.getLogger("zaitax.startup")
+
+import_times_ms = {}  # module name -> milliseconds spent on its first import
+_import_lock = threading.Lock()
+
+
+def timed_import(name):
+    """Import name (timing it if it was not loaded yet) and return the module."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _import_lock:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        import_times_ms.setdefault(name, (time.perf_counter() - start) * 1000)
+    return module
+
+
+class _LazyModule:
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = timed_import(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name):
+    """Return a stand-in for module name that imports it on first attribute access."""
+    return _LazyModule(name)
+
+
+# ─────────────────────────────────────────────────────────────
+# PER-RUN PROFILE
+# ─────────────────────────────────────────────────────────────
+_first_run_done = False
+
+
+class RunProfile:
+    """Marks named phases of one script run; reported once by finish()."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = []
+        self.finished = False
+
+    def mark(self, label):
+        self.marks.append((label, (time.perf_counter() - self.start) * 1000))
+
+    def finish(self, label="first_render"):
+        global _first_run_done
+        if self.finished or not PROFILE_ENABLED:
+            return
+        self.finished = True
+        self.mark(label)
+        total_ms = self.marks[-1][1]
+        cold = not _first_run_done
+        _first_run_done = True
+
+        phases  = ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.marks)
+        imports = ", ".join(f"{name} {ms:.0f}ms" for name, ms in
+                            sorted(import_times_ms.items(), key=lambda kv: -kv[1])) or "none"
+        logger.warning("%s run: %s | lazy imports: %s",
+                       "cold" if cold else "warm", phases, imports)
+        if cold and total_ms > STARTUP_BUDGET_MS:
+            logger.warning("first render took %.0fms, over the %.0fms startup budget",
+                           total_ms, STARTUP_BUDGET_MS)
+
+
+def profile_run():
+    return RunProfile()
+
+
+# ─────────────────────────────────────────────────────────────
+# COLD IMPORT BUDGET CHECK
+# ─────────────────────────────────────────────────────────────
+def measure_cold_imports(modules=APP_MODULES):
+    """
+    Import modules in a fresh interpreter with -X importtime and return
+    (total_ms, {top-level module: cumulative ms}).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=here, capture_output=True, text=True, check=True)
+    per_module = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented further; keep only top-level ones
+        if not name.startswith("  "):
+            per_module[name.strip()] = int(cumulative) / 1000
+    total_ms = sum(per_module.values())
+    return total_ms, per_module
+
+
+def main():
+    total_ms, per_module = measure_cold_imports()
+    for name, ms in sorted(per_module.items(), key=lambda kv: -kv[1])[:15]:
+        print(f"{ms:8.1f} ms  {name}")
+    print(f"{total_ms:8.1f} ms  total (budget {STARTUP_BUDGET_MS:.0f} ms)")
+    return 0 if total_ms <= STARTUP_BUDGET_MS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,421 @@
+"""
+User-facing texts (Spanish and English) and number formatting.
+
+Shared by the Streamlit app and the report builder, which also runs outside
+the script (background report jobs, batch tools).
+"""
+
+
+# US notation in both languages
+def fmt_num(value: float, lang: str = None, currency="$", decimals=2) -> str:
+    """
+    Always formats using US notation (commas as thousand separators,
+    period as decimal point), e.g. $12,500.00.
+    The lang parameter is kept for signature compatibility but is not used.
+    """
+    if value is None:
+        return f"{currency}0"
+    s = f"{value:,.{decimals}f}"
+    return f"{currency}{s}"
+
+
+texts = {
+    "es": {
+        # Landing
+        "landing_title": "ZaiOT — Calculadora de Deducción por Horas Extras",
+        "landing_subtitle": "Calcula tu deducción calificada bajo la Ley OBBB 2025 en minutos.",
+        "landing_disclaimer": "Esta herramienta ofrece estimaciones con fines informativos. No constituye asesoría fiscal.",
+        "plan_single_name": "Pago por uso",
+        "plan_single_price": "$5",
+        "plan_single_desc": "Ideal para una sola consulta.",
+        "plan_single_features": ["1 cálculo total", "Acceso válido por 6 meses o hasta usar", "Reporte PDF descargable"],
+        "plan_sub_name": "100 usos mensuales",
+        "plan_sub_price": "$60 / mes",
+        "plan_sub_desc": "Para contadores o uso frecuente.",
+        "plan_sub_features": ["100 cálculos por mes", "Acceso válido 30 días desde la compra", "Renovación manual volviendo a pagar", "Reporte PDF descargable"],
+        "btn_buy_single": "Comprar — $5",
+        "btn_buy_sub": "Comprar — $60/mes",
+        "resend_title": "¿Ya compraste? Recupera tu acceso",
+        "resend_placeholder": "tu@email.com",
+        "resend_btn": "Reenviar acceso",
+        "resend_sending": "Enviando...",
+        "resend_success": "Si este correo tiene una compra registrada, recibirás el enlace en breve.",
+        "resend_error": "Por favor ingresa un correo válido.",
+        # Toasts / banners
+        "toast_welcome": "¡Pago exitoso! Ya puedes usar la calculadora.",
+        "toast_single_consumed": "Tu uso ha sido consumido. ¡Gracias por usar ZaiOT!",
+        "toast_sub_low_5": "Te quedan solo 5 usos este mes.",
+        "toast_sub_low_1": "Te queda solo 1 uso este mes.",
+        "toast_sub_exhausted": "Has agotado todos tus usos del mes. ¡Gracias por usar ZaiOT!",
+        "banner_single_active": "✅ Plan: Pago por uso &nbsp;|&nbsp; 1 uso disponible &nbsp;|&nbsp; Vence: {date}",
+        "banner_single_used": "🔒 Plan: Pago por uso &nbsp;|&nbsp; Uso ya consumido",
+        "banner_sub_active": "✅ Plan: 100 usos mensuales &nbsp;|&nbsp; {uses} usos restantes &nbsp;|&nbsp; Vence: {date}",
+        "banner_sub_low": "⚠️ Plan: 100 usos mensuales &nbsp;|&nbsp; {uses} usos restantes &nbsp;|&nbsp; Vence: {date}",
+        # Token status
+        "token_expired_single": "Tu acceso de pago por uso ha expirado.",
+        "token_expired_sub": "Tu suscripción ha expirado o agotó los 100 usos.",
+        "token_consumed_single": "Tu cálculo ya fue realizado. Este token de un solo uso ha sido consumido.",
+        "token_consumed_sub": "Has agotado todos tus usos del mes.",
+        "token_invalid": "Token no válido o no encontrado.",
+        "token_buy_again_single": "Comprar nuevo acceso — $5",
+        "token_buy_again_sub": "Renovar suscripción — $60/mes",
+        "token_recover": "O recupera tu acceso anterior:",
+        # Consume errors
+        "consume_error": "Error al procesar tu cálculo. Intenta nuevamente.",
+        "consume_expired": "Tu acceso expiró entre la validación y el cálculo. Recarga la página.",
+        "calc_btn_single_used": "🔒 Ya realizaste tu cálculo. Este token de un solo uso ha sido consumido.",
+        "calc_btn_sub_exhausted": "🔒 Has agotado todos tus usos del mes.",
+        "calc_uses_remaining": "🔢 Usos restantes: **{uses}**",
+        "calc_confirm_check": "Estoy seguro de los datos proporcionados",
+        "calc_btn_buy_more": "¿Necesitas más cálculos? Compra otro plan:",
+        "calc_btn_buy_single_lbl": "Pago por uso — $5",
+        "calc_btn_buy_sub_lbl": "100 usos mensuales — $60/mes",
+        "calc_btn_uses_label_single": "1 uso",
+        "calc_btn_uses_label_sub": "{uses} usos restantes",
+        # Calculator
+        "title": "Calculadora de Deducción por Horas Extras Calificadas (Ley OBBB 2025)",
+        "desc": "Estimación de la deducción anual máxima aplicable a las horas extras calificadas (hasta $12,500 para declaración individual o $25,000 para declaración conjunta de casados).",
+        "step1_title": "Paso 1: Verificación de requisitos básicos (obligatorio)",
+        "step1_info": "Complete las preguntas de este paso para verificar si cumple con los requisitos básicos de elegibilidad.",
+        "over_40_label": "¿Se compensan las horas trabajadas por encima de 40 semanales con pago de horas extras?",
+        "ss_check_label": "¿El contribuyente posee un Número de Seguro Social (SSN) válido para trabajar?",
+        "itin_check_label": "¿El contribuyente posee un Número de Identificación Tributaria Individual (ITIN)?",
+        "ot_1_5x_label": "¿La mayoría de las horas extras se remuneran con una tarifa de tiempo y medio (1.5x la tarifa regular)?",
+        "unlock_message": "De acuerdo con las respuestas proporcionadas, es posible que no se cumplan los requisitos para aplicar la deducción. Se recomienda consultar con un contador profesional antes de continuar.",
+        "step1_ineligible_error": "❌ No cumple con los requisitos básicos para continuar al Paso 2. Revise sus respuestas o consulte con un contador profesional.",
+        "eligible_blocked_info": "✅ Sus respuestas cumplen con los requisitos básicos de elegibilidad.",
+        "step2_title": "Paso 2: Ingreso de datos de ingresos y horas extras",
+        "step2_info": "Ingrese su ingreso total aproximado del año (incluyendo todos los conceptos gravables).",
+        "magi_label": "Ingreso total aproximado del año (incluye salario base, horas extras, bonos, etc) ($)",
+        "filing_status_label": "Estado civil para efectos de la declaración de impuestos",
+        "filing_status_options": ["Soltero(a)", "Cabeza de familia", "Casado(a) presentando declaración conjunta", "Casado(a) presentando declaración por separado"],
+        "calculate_button": "Calcular deducción estimada",
+        "results_title": "Resultados estimados",
+        "footer": "Información actualizada al {date}\nEsta herramienta ofrece únicamente una estimación. Consulte siempre con un profesional de impuestos.",
+        "answer_options": ["Sí", "No", "No estoy seguro(a)"],
+        "step2_completed_msg": "✅ Paso 2 completado. Puede continuar con el Paso 3.",
+        "step3_title": "Paso 3: Selección del método para ingresar datos de horas extras",
+        "step3_info": "Seleccione el método más conveniente y complete los campos correspondientes.",
+        "choose_method_label": "Seleccione el método para reportar las horas extras",
+        "choose_method_options": ["Dispongo del monto total pagado por horas extras (Opción A)", "Dispongo del detalle de horas trabajadas y tarifa regular (Opción B)"],
+        "option_a_title": "**Opción A** — Ingreso por monto total pagado",
+        "ot_total_1_5_paid_label": "Monto total recibido por horas extras a tiempo y medio durante el año ($)",
+        "ot_total_1_5_paid_help": "Sume todos los importes recibidos por concepto de horas extras remuneradas a tarifa de tiempo y medio.",
+        "ot_total_2_0_paid_label": "Monto total recibido por horas extras a doble tarifa durante el año ($)",
+        "ot_total_2_0_paid_help": "Sume todos los importes recibidos por concepto de horas extras remuneradas al doble de la tarifa regular.",
+        "option_b_title": "**Opción B** — Ingreso por horas trabajadas y tarifa regular",
+        "regular_rate_label": "Tarifa horaria regular ($ por hora)",
+        "regular_rate_help": "Indique el monto que se paga por hora de trabajo regular.",
+        "ot_hours_1_5_label": "Horas totales trabajadas a tiempo y medio durante el año",
+        "ot_hours_1_5_help": "Registre la suma total de horas extras trabajadas a tarifa de tiempo y medio (1.5x) durante el año.",
+        "dt_hours_2_0_label": "Horas totales trabajadas a doble tarifa durante el año",
+        "dt_hours_2_0_help": "Registre las horas trabajadas al doble de la tarifa regular.",
+        "over_40_help": "Indique si las horas trabajadas por encima de 40 semanales generan un pago adicional.",
+        "ot_1_5x_help": "Confirme si la mayor parte del pago adicional por horas extras corresponde a una tarifa de tiempo y medio.",
+        "ss_check_help": "La deducción requiere que el contribuyente posea un Número de Seguro Social válido para empleo.",
+        "itin_check_help": "La presencia de un ITIN en lugar de un SSN válido impide aplicar esta deducción.",
+        # Errors
+        "error_empty_option_a": "⚠️ La Opción A está incompleta. Complete al menos uno de los montos.",
+        "error_empty_option_b": "⚠️ La Opción B está incompleta. Ingrese la tarifa regular y al menos una cantidad de horas.",
+        "error_missing_total_income": "⚠️ Debe ingresar el ingreso total aproximado del año para continuar.",
+        "error_income_less_than_ot": "El ingreso total reportado parece ser inferior al monto total pagado por horas extras. Revise sus respuestas.",
+        "warning_no_method_chosen": "Debe seleccionar un método de ingreso de horas extras para continuar.",
+        "method_hours": "Por horas trabajadas (Opción B)",
+        "method_total": "Por monto total pagado (Opción A)",
+        # Rate verification
+        "actual_rate_1_5_label": "Tarifa real pagada por horas extras a tiempo y medio ($ por hora)",
+        "actual_rate_1_5_help": "Ingrese la tarifa exacta que aparece en su recibo de pago por horas extras a 1.5x. Si no aplica, deje en 0.",
+        "actual_rate_2_0_label": "Tarifa real pagada por horas extras a doble tarifa ($ por hora)",
+        "actual_rate_2_0_help": "Ingrese la tarifa exacta que aparece en su recibo de pago por horas extras a 2.0x. Si no aplica, deje en 0.",
+        "rate_mismatch_warning_1_5": "⚠️ La tarifa real ingresada x1.5 (\\${actual}) difiere de la tarifa esperada (\\${expected} = tarifa regular × 1.5). Esto puede ocurrir si su empleador usa un método de cálculo diferente.",
+        "rate_mismatch_warning_2_0": "⚠️ La tarifa real ingresada x2.0 (\\${actual}) difiere de la tarifa esperada (\\${expected} = tarifa regular × 2.0). Esto puede ocurrir si su empleador usa un método de cálculo diferente.",
+        "rate_match_info": "✅ La tarifa real coincide con la tarifa esperada.",
+        "ytd_override_label_1_5": "Total acumulado de horas extras a tiempo y medio según su recibo de pago ($)",
+        "ytd_override_label_2_0": "Total acumulado de horas extras a doble tarifa según su recibo de pago ($)",
+        "ytd_override_help": "Debido a la diferencia de tarifas, use el monto total acumulado del año directamente de su recibo de pago para mayor precisión.",
+        "error_ytd_required_1_5": "⚠️ La tarifa real de tiempo y medio no coincide con la esperada. Debe ingresar el total del recibo de pago para continuar.",
+        "error_ytd_required_2_0": "⚠️ La tarifa real de doble tarifa no coincide con la esperada. Debe ingresar el total del recibo de pago para continuar.",
+        # Results / table
+        "data_tab_title": "Desglose completo",
+        "data_subtitle": "Desglose completo del cálculo",
+        "data_column_concept": "Concepto",
+        "data_column_value": "Valor",
+        "results_tab_title": "Resultados y deducción estimada",
+        "total_deduction_label": "Deducción aplicable en la línea 14 del Schedule 1a (Formulario 1040)",
+        "total_deduction_delta": "Monto final a deducir de la base imponible",
+        "total_deduction_success": "Esta es la cantidad que puede utilizar en la línea 14 del Schedule 1a. 💰",
+        "total_deduction_no_limit": "**Puede deducir {}** correspondiente al pago adicional por horas extras calificadas.",
+        "total_deduction_with_limit": "**Puede deducir {}** por concepto de horas extras (limitado por el nivel de ingresos).",
+        "limit_info": "El pago adicional por horas extras ascendió a {}, pero de acuerdo con el ingreso total, el monto máximo deducible es {}. Por ello se ajusta a esta cantidad.",
+        "breakdown_subtitle": "Desglose detallado",
+        "qoc_gross_label": "Monto total correspondiente al pago adicional por horas extras",
+        "phaseout_limit_label": "Límite máximo deducible según nivel de ingresos",
+        "final_after_limit_label": "**Deducción final tras aplicar límite máximo permitido**",
+        "sensitivity_subtitle": "¿Cómo cambiaría mi deducción?",
+        "sensitivity_caption": "Deducción estimada para otros niveles de ingreso (MAGI) y de horas extras, con su estado civil. Su MAGI: {}.",
+        "sensitivity_ot_scale": "Horas extras pagadas (% de lo ingresado)",
+        "sensitivity_magi_axis": "MAGI",
+        "sensitivity_limit_series": "Límite tras phase-out",
+        "sensitivity_deduction_series": "Deducción estimada",
+        "sensitivity_point": "Con {}% de sus horas extras y su MAGI actual, la deducción sería {}.",
+        # Table section headers
+        "section_eligibility": "📋 Elegibilidad",
+        "section_income":      "💰 Ingresos",
+        "section_ot_inputs":   "⏱ Datos de horas extras",
+        "section_rate_check":  "🔍 Verificación de tarifas",
+        "section_ot_totals":   "📊 Totales de horas extras",
+        "section_deduction":   "✅ Deducción estimada",
+        # Table row labels
+        "data_base_salary":               "Salario base estimado",
+        "data_method_used":               "Método utilizado",
+        "data_ot_total_paid":             "Total pagado por horas extras",
+        "data_rate_mismatch":              "Diferencia de tarifa detectada",
+        "data_mismatch_none":             "Ninguna",
+        "data_mismatch_both":             "1.5× y 2.0×",
+        "data_source_calculated":         "Calculado (horas × tarifa)",
+        "data_source_override":           "Total ingresado desde recibo de pago",
+        "data_premium_1_5":               "Pago adicional a 1.5× (deducible)",
+        "data_premium_2_0":               "Pago adicional a 2.0× (deducible)",
+        "data_qoc_gross":                 "Total prima calificada (antes de límite)",
+        "data_concept_expected_rate_1_5": "Tarifa esperada a tiempo y medio (regular × 1.5)",
+        "data_concept_expected_rate_2_0": "Tarifa esperada a doble tarifa (regular × 2.0)",
+        # PDF
+        "spinner_generating_pdf": "Generando reporte PDF...",
+        "pdf_job_queued": "Reporte en cola ({ahead} por delante)...",
+        "pdf_job_progress": "Generando reporte: {pages} páginas, {merged}/{total} documentos adjuntos",
+        "pdf_queue_full": "Hay demasiados reportes en proceso. Intente de nuevo en unos segundos.",
+        "generate_pdf": "Generar reporte PDF",
+        "generated_pdf_success": "Reporte generado exitosamente",
+        "generated_pdf_success_info": "El documento ya está listo. Puede descargarlo utilizando el botón inferior.",
+        "download_button_now": "Descargar Reporte PDF",
+        "download_section_title": "Generación y descarga del reporte",
+        "download_name_label": "Nombre completo del contribuyente (aparecerá en el reporte)",
+        "download_name_placeholder": "Ejemplo: Juan Pérez",
+        "download_docs_label": "Adjuntar documentos de respaldo (W-2, recibos de pago, etc.) – opcional",
+        "download_docs_help": "Puede cargar uno o varios archivos PDF. Estos se incorporarán al final del reporte.",
+        "pdf_title": "Reporte de Deducción por Horas Extras Calificadas – Ley OBBB 2025",
+        "pdf_generated_by": "Hecho por ZaiOT",
+        "pdf_date": "Fecha: {}",
+        "pdf_user_name": "Nombre del contribuyente:",
+        "pdf_used_count": "Documentos adjuntos:",
+        "pdf_summary_title": "Desglose completo del cálculo",
+        "pdf_evidence_title": "Documentos adjuntos como evidencia",
+        "pdf_no_docs": "No se adjuntaron documentos de respaldo.",
+        "pdf_docs_attached": "Se adjuntan {} documento(s) como evidencia.",
+        "pdf_final_deduction": "DEDUCCIÓN FINAL ESTIMADA: {}",
+        "disclaimer_label": "AVISO LEGAL Y DESCARGO DE RESPONSABILIDAD",
+        "disclaimer": "**Descargo de responsabilidad:** Esta herramienta tiene únicamente fines informativos y de estimación.",
+        # ── CHANGE 2: updated disclaimer_msg (Spanish) ────────────────────────
+        "disclaimer_msg": "IMPORTANTE: Esta calculadora genera estimaciones aproximadas de la deducción por horas extras calificadas conforme a la Ley OBBB 2025. No representa asesoría fiscal, legal ni contable. Los resultados son orientativos y no garantizan su aceptación por parte del IRS. Se recomienda consultar con un contador público autorizado antes de incluir cualquier deducción en una declaración de impuestos. El uso de esta herramienta es bajo exclusiva responsabilidad del usuario.\n\nEsta herramienta es solo para calcular. Al generar el reporte NO se guarda en una base de datos (ZaiOT y usuarios).",
+        "language_label": "🌐 Idioma",
+        "language_options": ["Español", "English"],
+        "button_continue": "Continuar",
+        "error_pdf_generation": "❌ Error al generar el PDF: {}",
+        "edit_hint": "Usa la barra de navegación para volver a este paso y editarlo.",
+        # Navigation
+        "nav_step1": "📋 Paso 1: Elegibilidad",
+        "nav_step2": "💰 Paso 2: Ingresos",
+        "nav_step3": "⏱ Paso 3: Horas extras",
+        "nav_label":  "Navegar a:",
+        "nav_start_over": "🔄 Comenzar de nuevo",
+    },
+    "en": {
+        # Landing
+        "landing_title": "ZaiOT — Overtime Deduction Calculator",
+        "landing_subtitle": "Calculate your qualified deduction under the OBBB Act 2025 in minutes.",
+        "landing_disclaimer": "This tool provides estimates for informational purposes only. It does not constitute tax advice.",
+        "plan_single_name": "Pay per use",
+        "plan_single_price": "$5",
+        "plan_single_desc": "Ideal for a one-time consultation.",
+        "plan_single_features": ["1 calculation total", "Access valid for 6 months or until used", "Downloadable PDF report"],
+        "plan_sub_name": "Monthly 100 uses",
+        "plan_sub_price": "$60 / month",
+        "plan_sub_desc": "For accountants or frequent use.",
+        "plan_sub_features": ["100 calculations per month", "Access valid 30 days from purchase", "Manual renewal by purchasing again", "Downloadable PDF report"],
+        "btn_buy_single": "Buy — $5",
+        "btn_buy_sub": "Buy — $60/mo",
+        "resend_title": "Already purchased? Recover your access",
+        "resend_placeholder": "your@email.com",
+        "resend_btn": "Resend access",
+        "resend_sending": "Sending...",
+        "resend_success": "If this email has a registered purchase, you will receive the link shortly.",
+        "resend_error": "Please enter a valid email address.",
+        # Toasts / banners
+        "toast_welcome": "Payment successful! You can now use the calculator.",
+        "toast_single_consumed": "Your use has been consumed. Thank you for using ZaiOT!",
+        "toast_sub_low_5": "You have only 5 uses left this month.",
+        "toast_sub_low_1": "You have only 1 use left this month.",
+        "toast_sub_exhausted": "You have used all your monthly uses. Thank you for using ZaiOT!",
+        "banner_single_active": "✅ Plan: Pay per use &nbsp;|&nbsp; 1 use available &nbsp;|&nbsp; Expires: {date}",
+        "banner_single_used": "🔒 Plan: Pay per use &nbsp;|&nbsp; Use already consumed",
+        "banner_sub_active": "✅ Plan: Monthly 100 uses &nbsp;|&nbsp; {uses} uses remaining &nbsp;|&nbsp; Expires: {date}",
+        "banner_sub_low": "⚠️ Plan: Monthly 100 uses &nbsp;|&nbsp; {uses} uses remaining &nbsp;|&nbsp; Expires: {date}",
+        # Token status
+        "token_expired_single": "Your pay-per-use access has expired.",
+        "token_expired_sub": "Your subscription has expired or exhausted all 100 uses.",
+        "token_consumed_single": "Your calculation has already been completed. This single-use token has been consumed.",
+        "token_consumed_sub": "You have used all your monthly uses.",
+        "token_invalid": "Token not valid or not found.",
+        "token_buy_again_single": "Buy new access — $5",
+        "token_buy_again_sub": "Renew subscription — $60/mo",
+        "token_recover": "Or recover your previous access:",
+        # Consume errors
+        "consume_error": "Error processing your calculation. Please try again.",
+        "consume_expired": "Your access expired between validation and calculation. Please reload the page.",
+        "calc_btn_single_used": "🔒 Your calculation has already been completed. This single-use token has been consumed.",
+        "calc_btn_sub_exhausted": "🔒 You have used all your monthly uses.",
+        "calc_uses_remaining": "🔢 Uses remaining: **{uses}**",
+        "calc_confirm_check": "I confirm the provided data is accurate",
+        "calc_btn_buy_more": "Need more calculations? Purchase another plan:",
+        "calc_btn_buy_single_lbl": "Pay per use — $5",
+        "calc_btn_buy_sub_lbl": "Monthly 100 uses — $60/mo",
+        "calc_btn_uses_label_single": "1 use",
+        "calc_btn_uses_label_sub": "{uses} uses remaining",
+        # Calculator
+        "title": "Qualified Overtime Deduction Calculator (OBBB Act 2025)",
+        "desc": "Estimate of the maximum annual deduction applicable to qualified overtime pay (up to $12,500 for single filers or $25,000 for married filing jointly).",
+        "step1_title": "Step 1: Basic Eligibility Check (required)",
+        "step1_info": "Please answer the questions below to verify if you meet the basic eligibility requirements.",
+        "over_40_label": "Are hours worked over 40 per week compensated with overtime pay?",
+        "ss_check_label": "Does the taxpayer have a valid Social Security Number (SSN) for employment?",
+        "itin_check_label": "Does the taxpayer have an Individual Taxpayer Identification Number (ITIN)?",
+        "ot_1_5x_label": "Are most overtime hours paid at time-and-a-half rate (1.5x the regular rate)?",
+        "unlock_message": "Based on the responses provided, the requirements for this deduction may not be met. It is recommended to consult a tax professional before proceeding.",
+        "step1_ineligible_error": "❌ You do not meet the basic requirements to continue to Step 2. Please review your answers or consult a tax professional.",
+        "eligible_blocked_info": "✅ Your answers meet the basic eligibility requirements.",
+        "step2_title": "Step 2: Enter Income and Overtime Data",
+        "step2_info": "Please enter your approximate total income for the year (including all taxable income).",
+        "magi_label": "Approximate total annual income (includes base salary, overtime, bonuses, etc.) ($)",
+        "filing_status_label": "Filing status for tax purposes",
+        "filing_status_options": ["Single", "Head of Household", "Married Filing Jointly", "Married Filing Separately"],
+        "calculate_button": "Calculate Estimated Deduction",
+        "results_title": "Estimated Results",
+        "footer": "Information updated as of {date}\nThis tool provides an estimate only. Always consult a tax professional.",
+        "answer_options": ["Yes", "No", "Not sure"],
+        "step2_completed_msg": "✅ Step 2 completed. You may proceed to Step 3.",
+        "step3_title": "Step 3: Select Method to Enter Overtime Data",
+        "step3_info": "Choose the most convenient method and complete the corresponding fields.",
+        "choose_method_label": "Select the method for reporting overtime",
+        "choose_method_options": ["I have the total amount paid for overtime (Option A)", "I have the breakdown of hours worked and regular rate (Option B)"],
+        "option_a_title": "**Option A** — Total amount paid",
+        "ot_total_1_5_paid_label": "Total amount received for time-and-a-half overtime during the year ($)",
+        "ot_total_1_5_paid_help": "Sum all amounts received for overtime paid at time-and-a-half rate.",
+        "ot_total_2_0_paid_label": "Total amount received for double-time overtime during the year ($)",
+        "ot_total_2_0_paid_help": "Sum all amounts received for overtime paid at double the regular rate.",
+        "option_b_title": "**Option B** — Hours worked and regular rate",
+        "regular_rate_label": "Regular hourly rate ($ per hour)",
+        "regular_rate_help": "Enter the amount paid per hour for regular work.",
+        "ot_hours_1_5_label": "Total hours worked at time-and-a-half during the year",
+        "ot_hours_1_5_help": "Enter the total number of overtime hours worked at 1.5x the regular rate.",
+        "dt_hours_2_0_label": "Total hours worked at double time during the year",
+        "dt_hours_2_0_help": "Enter hours worked at double the regular rate.",
+        "over_40_help": "Indicate whether hours worked over 40 per week are compensated with overtime pay.",
+        "ot_1_5x_help": "Confirm whether most overtime premium pay is at the time-and-a-half rate.",
+        "ss_check_help": "This deduction requires the taxpayer to have a valid Social Security Number for employment.",
+        "itin_check_help": "Having an ITIN instead of a valid SSN prevents eligibility for this deduction.",
+        # Errors
+        "error_empty_option_a": "⚠️ Option A is incomplete. Please enter at least one amount.",
+        "error_empty_option_b": "⚠️ Option B is incomplete. Please enter the regular rate and at least one hour amount.",
+        "error_missing_total_income": "⚠️ You must enter the approximate total annual income to continue.",
+        "error_income_less_than_ot": "The reported total income seems to be less than the total overtime pay. Please check your answers.",
+        "warning_no_method_chosen": "You must select a method for entering overtime data to continue.",
+        "method_hours": "By hours worked (Option B)",
+        "method_total": "By total amount paid (Option A)",
+        # Rate verification
+        "actual_rate_1_5_label": "Actual overtime rate paid at time-and-a-half ($ per hour)",
+        "actual_rate_1_5_help": "Enter the exact rate shown on your pay stub for 1.5x overtime. Leave at 0 if not applicable.",
+        "actual_rate_2_0_label": "Actual overtime rate paid at double time ($ per hour)",
+        "actual_rate_2_0_help": "Enter the exact rate shown on your pay stub for 2.0x overtime. Leave at 0 if not applicable.",
+        "rate_mismatch_warning_1_5": "⚠️ The actual rate entered x1.5 (${actual}) differs from the expected rate (${expected} = regular rate × 1.5). This may happen if your employer uses a different calculation method.",
+        "rate_mismatch_warning_2_0": "⚠️ The actual rate entered x2.0 (${actual}) differs from the expected rate (${expected} = regular rate × 2.0). This may happen if your employer uses a different calculation method.",
+        "rate_match_info": "✅ Actual rate matches the expected rate.",
+        "ytd_override_label_1_5": "Total time-and-a-half overtime from your pay stub ($)",
+        "ytd_override_label_2_0": "Total double-time overtime from your pay stub ($)",
+        "ytd_override_help": "Due to the rate difference, use the year-to-date total directly from your pay stub for greater accuracy.",
+        "error_ytd_required_1_5": "⚠️ The actual time-and-a-half rate does not match the expected rate. You must enter the total from your pay stub to continue.",
+        "error_ytd_required_2_0": "⚠️ The actual double-time rate does not match the expected rate. You must enter the total from your pay stub to continue.",
+        # Results / table
+        "data_tab_title": "Full Breakdown",
+        "data_subtitle": "Full Calculation Breakdown",
+        "data_column_concept": "Concept",
+        "data_column_value": "Value",
+        "results_tab_title": "Results and Estimated Deduction",
+        "total_deduction_label": "Deduction applicable on line 14 of Schedule 1a (Form 1040)",
+        "total_deduction_delta": "Final amount to be deducted from taxable income",
+        "total_deduction_success": "This is the amount you can use on line 14 of Schedule 1a. 💰",
+        "total_deduction_no_limit": "**You may deduct {}** corresponding to qualified overtime premium pay.",
+        "total_deduction_with_limit": "**You may deduct {}** for overtime (limited by income level).",
+        "limit_info": "The overtime premium amounted to {}, but based on total income, the maximum allowable deduction is {}. The amount has been adjusted accordingly.",
+        "breakdown_subtitle": "Detailed Breakdown",
+        "qoc_gross_label": "Total qualified overtime premium amount",
+        "phaseout_limit_label": "Maximum deductible limit based on income level",
+        "final_after_limit_label": "**Final deduction after applying maximum limit**",
+        "sensitivity_subtitle": "How would my deduction change?",
+        "sensitivity_caption": "Estimated deduction for other income (MAGI) and overtime levels, with your filing status. Your MAGI: {}.",
+        "sensitivity_ot_scale": "Overtime paid (% of what you entered)",
+        "sensitivity_magi_axis": "MAGI",
+        "sensitivity_limit_series": "Limit after phase-out",
+        "sensitivity_deduction_series": "Estimated deduction",
+        "sensitivity_point": "With {}% of your overtime and your current MAGI, the deduction would be {}.",
+        # Table section headers
+        "section_eligibility": "📋 Eligibility",
+        "section_income":      "💰 Income",
+        "section_ot_inputs":   "⏱ Overtime Inputs",
+        "section_rate_check":  "🔍 Rate Verification",
+        "section_ot_totals":   "📊 Overtime Totals",
+        "section_deduction":   "✅ Estimated Deduction",
+        # Table row labels
+        "data_base_salary":               "Estimated base salary",
+        "data_method_used":               "Calculation method used",
+        "data_ot_total_paid":             "Total overtime paid",
+        "data_rate_mismatch":              "Rate mismatch detected",
+        "data_mismatch_none":             "None",
+        "data_mismatch_both":             "1.5× and 2.0×",
+        "data_source_calculated":         "Calculated (hours × rate)",
+        "data_source_override":           "Total entered from pay stub",
+        "data_premium_1_5":               "Overtime premium at 1.5× (deductible)",
+        "data_premium_2_0":               "Overtime premium at 2.0× (deductible)",
+        "data_qoc_gross":                 "Total qualified premium (before limit)",
+        "data_concept_expected_rate_1_5": "Expected time-and-a-half rate (regular × 1.5)",
+        "data_concept_expected_rate_2_0": "Expected double-time rate (regular × 2.0)",
+        # PDF
+        "spinner_generating_pdf": "Generating PDF report...",
+        "pdf_job_queued": "Report queued ({ahead} ahead)...",
+        "pdf_job_progress": "Generating report: {pages} pages, {merged}/{total} attached documents",
+        "pdf_queue_full": "Too many reports are being generated right now. Please try again in a few seconds.",
+        "generate_pdf": "Generate PDF Report",
+        "generated_pdf_success": "Report generated successfully",
+        "generated_pdf_success_info": "The document is ready. You may now download the report below.",
+        "download_button_now": "Download PDF Report",
+        "download_section_title": "Report Generation and Download",
+        "download_name_label": "Taxpayer's full name (will appear on the report)",
+        "download_name_placeholder": "Example: John Smith",
+        "download_docs_label": "Attach supporting documents (W-2, pay stubs, etc.) – optional",
+        "download_docs_help": "You may upload one or more PDF files. They will be appended to the generated report.",
+        "pdf_title": "Qualified Overtime Deduction Report – OBBB Act 2025",
+        "pdf_generated_by": "Made by ZaiOT",
+        "pdf_date": "Date: {}",
+        "pdf_user_name": "Taxpayer name:",
+        "pdf_used_count": "Attached documents:",
+        "pdf_summary_title": "Full Calculation Breakdown",
+        "pdf_evidence_title": "Supporting Documents Attached",
+        "pdf_no_docs": "No supporting documents were attached.",
+        "pdf_docs_attached": "{} document(s) attached as evidence.",
+        "pdf_final_deduction": "FINAL ESTIMATED DEDUCTION: {}",
+        "disclaimer_label": "LEGAL NOTICE AND DISCLAIMER",
+        "disclaimer": "**Disclaimer:** This tool is provided for informational and estimation purposes only.",
+        # ── CHANGE 2: updated disclaimer_msg (English) ────────────────────────
+        "disclaimer_msg": "IMPORTANT: This calculator generates approximate estimates of the qualified overtime deduction under the OBBB Act 2025. It is not tax, legal, or accounting advice. Results are for guidance only and do not guarantee acceptance by the IRS. It is strongly recommended to consult a certified public accountant before claiming any deduction. Use of this tool is at the user's sole responsibility.\n\nThis tool is for calculation purposes only. When generating the report, NO data is stored in any database (ZaiOT or users).",
+        "language_label": "🌐 Language",
+        "language_options": ["Spanish", "English"],
+        "button_continue": "Continue",
+        "error_pdf_generation": "❌ Error generating PDF: {}",
+        "edit_hint": "Use the navigation bar to return to this step and edit it.",
+        # Navigation
+        "nav_step1": "📋 Step 1: Eligibility",
+        "nav_step2": "💰 Step 2: Income",
+        "nav_step3": "⏱ Step 3: Overtime",
+        "nav_label":  "Go to:",
+        "nav_start_over": "🔄 Start Over",
+    }
+}
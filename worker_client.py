@@ -0,0 +1,235 @@
+"""
+Calls to the Cloudflare worker that issues and meters access tokens.
+
+All calls share one pooled keep-alive HTTP session per process, retry
+transient failures with jittered exponential backoff inside a per-call
+latency budget, and go through a circuit breaker that fails fast while the
+worker is unhealthy.
+
+Validation responses are cached process-wide per token, so extra tabs and
+reruns after a websocket reconnect render without a network round trip.
+A successful consume drops the cached entry, since uses_left changed.
+
+Signed tokens (see signed_tokens.py) are verified locally when
+ZAITAX_TOKEN_SECRET is set (comma-separated to accept several keys during
+rotation), which skips the /validate-token round trip entirely.
+
+Point ZAITAX_WORKER_BASE at a local stand-in server to exercise the client
+without the real worker.
+"""
+import os
+import random
+import threading
+import time
+
+from cache import TTLCache
+from signed_tokens import is_signed_token, verify_signed_token
+from startup import lazy_module
+
+# Imported on the first real network call; signed tokens never need it
+requests = lazy_module("requests")
+
+DEFAULT_WORKER_BASE = "https://zaitax-ot.zaitaxot.workers.dev"
+
+VALIDATE_PATH = "/validate-token"
+CONSUME_PATH  = "/consume-token"
+RESEND_PATH   = "/resend-token"
+
+VALIDATE_TTL_SECONDS = 120
+VALIDATE_CACHE_SIZE  = 4096
+
+
+class WorkerUnavailable(Exception):
+    """The worker could not be reached within the call budget, or the circuit is open."""
+
+
+# ─────────────────────────────────────────────────────────────
+# CIRCUIT BREAKER
+# ─────────────────────────────────────────────────────────────
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures; while open every call
+    fails immediately. After reset_timeout seconds a single probe call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+
+# ─────────────────────────────────────────────────────────────
+# CLIENT
+# ─────────────────────────────────────────────────────────────
+def _never_sent(exc):
+    """True when the request provably never reached the worker (safe to retry a POST)."""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    from urllib3.exceptions import NewConnectionError
+
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(exc, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class WorkerClient:
+    """
+    - pool_size: keep-alive connections kept per host.
+    - max_retries: extra attempts after the first one. Non-idempotent calls
+      (consume, resend) are only retried when the request was never sent.
+    - backoff: base delay in seconds; attempt n sleeps uniform(0, backoff × 2ⁿ).
+    - budget: total seconds a call may take, retries and backoff included.
+    - attempt_timeout: cap for a single attempt (connect and read).
+    - signing_keys: HMAC keys for verifying signed tokens offline.
+    """
+
+    def __init__(self, base_url, *, pool_size=16, max_retries=2, backoff=0.2,
+                 budget=8.0, attempt_timeout=4.0, breaker=None, signing_keys=()):
+        self.base_url = base_url.rstrip("/")
+        self.signing_keys = tuple(signing_keys)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.budget = budget
+        self.attempt_timeout = attempt_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._validation_cache = TTLCache(maxsize=VALIDATE_CACHE_SIZE, ttl=VALIDATE_TTL_SECONDS)
+
+    @property
+    def session(self):
+        """Pooled keep-alive session, created on the first network call."""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                        pool_maxsize=self.pool_size,
+                                                        max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _call(self, method, path, *, idempotent, budget=None, **kwargs):
+        deadline = time.monotonic() + (budget or self.budget)
+        last_exc = None
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise WorkerUnavailable(f"circuit open for {self.base_url}") from last_exc
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            retryable = idempotent
+            try:
+                resp = self.session.request(method, self.base_url + path,
+                                            timeout=min(self.attempt_timeout, remaining),
+                                            **kwargs)
+                if resp.status_code >= 500 or resp.status_code == 429:
+                    raise requests.exceptions.HTTPError(
+                        f"{resp.status_code} from {path}", response=resp)
+                data = resp.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                last_exc = e
+                self.breaker.record_failure()
+                retryable = idempotent or _never_sent(e)
+            else:
+                self.breaker.record_success()
+                return data
+
+            if not retryable or attempt == self.max_retries:
+                break
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            if time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+
+        raise WorkerUnavailable(f"{method} {path} failed: {last_exc}") from last_exc
+
+    def validate(self, token):
+        """
+        Return the worker's validation payload for token. Signed tokens are
+        verified locally; others use the cache when possible. Failures raise
+        WorkerUnavailable and are never cached.
+        """
+        if self.signing_keys and is_signed_token(token):
+            return verify_signed_token(token, self.signing_keys)
+
+        cached = self._validation_cache.get(token)
+        if cached is not None:
+            return dict(cached)
+
+        data = self._call("GET", VALIDATE_PATH, idempotent=True, params={"token": token})
+        # "is_new" drives the one-time welcome toast; later sessions must not repeat it.
+        self._validation_cache.set(token, {**data, "is_new": False})
+        return data
+
+    def consume(self, token):
+        """Consume one use of token and return the worker's payload."""
+        data = self._call("POST", CONSUME_PATH, idempotent=False, json={"token": token})
+        if data.get("success"):
+            self._validation_cache.invalidate(token)
+        return data
+
+    def resend(self, email):
+        """Ask the worker to email the access link for a previous purchase."""
+        return self._call("POST", RESEND_PATH, idempotent=False, json={"email": email})
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url=None):
+    """Process-wide WorkerClient for base_url (default: ZAITAX_WORKER_BASE or the production worker)."""
+    base_url = base_url or os.environ.get("ZAITAX_WORKER_BASE", DEFAULT_WORKER_BASE)
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            secrets = os.environ.get("ZAITAX_TOKEN_SECRET", "")
+            keys = [k.strip().encode() for k in secrets.split(",") if k.strip()]
+            client = _clients[base_url] = WorkerClient(base_url, signing_keys=keys)
+        return client